@@ -1,21 +1,32 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
+from app.sqlite_profile import configure_sqlite, apply_sqlite_pragmas
+from app.postgres_profile import configure_postgres
+from app.logging_setup import configure_logging
+from app import metrics
 import os
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
-migrate = Migrate()
 
 def create_app(config_class='config.Config'):
     # Create and configure the app
     app = Flask(__name__)
     app.config.from_object(config_class)
     
-    # Initialize plugins
+    # Leveled logging through a queue, so request threads never wait on stderr
+    configure_logging(app)
+    
+    # Initialize plugins (SQLite files get the pooled production profile, Postgres its pool settings)
+    configure_sqlite(app)
+    configure_postgres(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    
+    # Migrations CLI (flask db ...); it pulls in alembic, so serverless instances skip it
+    if not app.config.get('SERVERLESS'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
     
     # Enable CORS for frontend requests
     CORS(app)
@@ -25,15 +36,36 @@ def create_app(config_class='config.Config'):
         # Import models to ensure they are registered with SQLAlchemy
         from app import models
         
-        # Create tables if they don't exist
-        db.create_all()
+        # WAL and tuned pragmas on every SQLite connection, before the first one is opened
+        apply_sqlite_pragmas(db.engine, app.config)
+        
+        # Per-route timing and database query counts for /metrics
+        if app.config.get('METRICS_ENABLED', True):
+            metrics.init_app(app)
         
-        # Check if the database has already been populated
-        if models.Product.query.count() == 0:
-            print("Creating initial database entries...")
-            
+        # Create tables if they don't exist. Serverless deploys skip this (no database
+        # round trip on cold start) and run `flask db upgrade` as a deploy step instead
+        if app.config.get('AUTO_CREATE_SCHEMA', True):
+            db.create_all()
+    
     # Register blueprints
-    from app.routes import main_bp
+    from app import routes
+    from app.routes import main_bp, price_average_cache, write_queue
     app.register_blueprint(main_bp)
     
+    # The async backend keeps PriceService's interface, so routes and the refresh worker use it as is
+    if app.config.get('SCRAPE_BACKEND') == 'async':
+        from app.async_price_service import AsyncPriceService
+        if not isinstance(routes.price_service, AsyncPriceService):
+            routes.price_service = AsyncPriceService()
+    routes.price_service.init_app(app)
+    price_average_cache.init_app(app)
+    write_queue.init_app(app)
+    
+    # Register CLI commands
+    from app.rollups import rollups_cli
+    from app.refresh_worker import refresh_worker_cli
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(refresh_worker_cli)
+    
     return app 
\ No newline at end of file
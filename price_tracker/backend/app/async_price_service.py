@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+from app.price_service import PriceService
+from app.scrape_cache import MISS
+from app.single_flight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def _phase_timer(phase):
+    """aiohttp trace callbacks adding a phase's duration to the request's timings dict."""
+    async def started(session, context, params):
+        setattr(context, phase + '_started', time.perf_counter())
+
+    async def ended(session, context, params):
+        timings = context.trace_request_ctx
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - getattr(context, phase + '_started')
+
+    return started, ended
+
+
+class AsyncBridge:
+    """Runs coroutines on one event loop in a background thread, for synchronous callers.
+
+    Flask request threads and the refresh worker call run(); every coroutine
+    shares the loop, so they also share its HTTP session and semaphores.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name='price-scrape-loop', daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def run(self, coro, timeout=None):
+        """Run coro on the loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+
+
+class AsyncPriceService(PriceService):
+    """PriceService on asyncio and aiohttp, for refreshing many products across stores.
+
+    Results, statuses, caching and fallbacks match PriceService. Scrapes are
+    coroutines instead of pool threads: one ClientSession, a cap on requests
+    in flight overall (max_concurrency) and per store host (store_concurrency),
+    and separate connect and read timeouts. Unfinished scrapes are cancelled
+    at the deadline rather than left running. The synchronous methods run the
+    async ones through an AsyncBridge, so routes and the refresh worker use it
+    unchanged.
+    """
+
+    def __init__(self, max_concurrency=64, connect_timeout=3.0, **kwargs):
+        super().__init__(**kwargs)
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = self.timeout
+        self.pool_maxsize = 4
+        self.bridge = AsyncBridge()
+        self.inflight = AsyncSingleFlight()
+        # Created on the bridge loop on first use
+        self._session = None
+        self._slots = None
+        self._host_slots = {}
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.max_concurrency = app.config.get('SCRAPE_ASYNC_MAX_CONCURRENCY', self.max_concurrency)
+        self.connect_timeout = app.config.get('SCRAPE_CONNECT_TIMEOUT_SECONDS', self.connect_timeout)
+        self.read_timeout = app.config.get('SCRAPE_READ_TIMEOUT_SECONDS', self.timeout)
+        self.pool_maxsize = app.config.get('SCRAPE_POOL_MAXSIZE', self.pool_maxsize)
+        self.close()
+
+    def close(self):
+        """Close the HTTP session (it is reopened on the next scrape)."""
+        if self._session is not None:
+            self.bridge.run(self._session.close())
+        self._session = None
+        self._slots = None
+        self._host_slots = {}
+
+    def _http(self):
+        # aiohttp is only imported once the first store is scraped
+        import aiohttp
+
+        if self._session is None:
+            # DNS lookups and new connections (DNS included) are timed for the scrape metrics
+            trace = aiohttp.TraceConfig()
+            dns_started, dns_ended = _phase_timer('dns')
+            trace.on_dns_resolvehost_start.append(dns_started)
+            trace.on_dns_resolvehost_end.append(dns_ended)
+            create_started, create_ended = _phase_timer('create')
+            trace.on_connection_create_start.append(create_started)
+            trace.on_connection_create_end.append(create_ended)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.pool_maxsize)
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector, trace_configs=[trace])
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.store_concurrency)
+        return slot
+
+    async def _scrape_async(self, source, product_name, timeout=None):
+        """Scrape a single source and return a (price, status) tuple."""
+        import aiohttp
+
+        timeout = timeout or self.timeout
+        url = source['url'].format(query=product_name.replace(' ', '+'))
+        session = self._http()
+        limits = aiohttp.ClientTimeout(
+            total=timeout,
+            sock_connect=min(self.connect_timeout, timeout),
+            sock_read=min(self.read_timeout, timeout)
+        )
+        timings = {}
+        try:
+            async with self._slots, self._host_slot(url):
+                started = time.perf_counter()
+                async with session.get(url, timeout=limits, trace_request_ctx=timings) as response:
+                    content = await response.read() if response.status == 200 else None
+                fetched = time.perf_counter()
+            dns = timings.get('dns')
+            connect = timings.get('create')
+            self._observe(source, dns=dns, connect=connect and connect - (dns or 0),
+                          fetch=fetched - started - (connect or 0))
+            if content is None:
+                logger.warning("Failed to fetch from %s: Status code %s", source['name'], response.status)
+                return None, f"http_{response.status}"
+
+            # Parsing is CPU-bound; keep it off the loop so other scrapes keep flowing
+            result = await asyncio.to_thread(self.parse_price, source, content)
+            self._observe(source, parse=time.perf_counter() - fetched)
+            return result
+        except asyncio.TimeoutError:
+            logger.warning("Timed out scraping %s", source['name'])
+            return None, 'timeout'
+        except Exception as e:
+            logger.warning("Error scraping %s: %s", source['name'], e)
+            return None, 'error'
+
+    async def _cached_scrape_async(self, source, product_name, timeout=None):
+        """Serve a scrape from the cache when possible, caching fresh results and failures."""
+        cached = await self._cache_call(self.cache.get, source['name'], product_name)
+        if cached is not MISS:
+            return cached, 'cached' if cached is not None else 'cached_failure'
+
+        key = self.cache.key(source['name'], product_name)
+        return await self.inflight.do(key, self._fresh_scrape_async, source, product_name, timeout)
+
+    async def _cache_call(self, method, *args):
+        """Call a scrape-cache method; with the SQLite backend it does disk I/O, so off the loop."""
+        if self.cache.backend is None:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    async def _fresh_scrape_async(self, source, product_name, timeout=None):
+        wait, refused = self._admit(source, timeout)
+        if refused:
+            return None, refused
+        requested = False
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            self._observe(source, wait=wait)
+            requested = True
+            price, status = await self._scrape_async(source, product_name, timeout)
+        except asyncio.CancelledError:
+            # Cancelled at the deadline or by the last waiter leaving: settle the breaker (and a
+            # half-open probe) before going, a slow store as a timeout
+            if requested:
+                self._record(source, 'timeout')
+            else:
+                self.guards.get(source['name'])[1].release()
+            raise
+        self._record(source, status)
+        await self._cache_call(self.cache.set, source['name'], product_name, price)
+        return price, status
+
+    async def _timed_scrape_async(self, source, product_name, timeout):
+        started = time.monotonic()
+        price, status = await self._cached_scrape_async(source, product_name, timeout)
+        return price, status, round((time.monotonic() - started) * 1000, 1)
+
+    async def _gather(self, scrapes, deadline):
+        """Run {key: coroutine} until deadline; returns {key: (price, status, latency_ms)}.
+
+        Scrapes still running at the deadline are cancelled and reported as 'timeout'.
+        """
+        tasks = {asyncio.ensure_future(coro): key for key, coro in scrapes.items()}
+        if not tasks:
+            return {}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        return {
+            key: task.result() if task in done else (None, 'timeout', None)
+            for task, key in tasks.items()
+        }
+
+    async def scrape_price_async(self, source, product_name, timeout=None):
+        """Scrape price from a single source."""
+        price, _ = await self._cached_scrape_async(source, product_name, timeout)
+        return price
+
+    async def get_product_price_async(self, product_name, store=None):
+        """Scrape price from the specified store or Amazon, falling back to generated prices."""
+        source = self.find_source(store) if store else self.sources[0]
+        if source is None:
+            logger.warning("Store %s not found in sources", store)
+        else:
+            logger.debug("Scraping price from %s for: %s", source['name'], product_name)
+            price = await self.scrape_price_async(source, product_name)
+            if price:
+                logger.debug("Price from %s: $%.2f", source['name'], price)
+                return round(price, 2)
+
+        logger.info("%s scraping failed, using fallback price generation", store or 'Amazon')
+        return self.generate_fallback_price(product_name)
+
+    async def get_prices_from_all_stores_async(self, product_name, deadline=None, stores=None):
+        """Every store's price, latency and status for one product, under one overall deadline."""
+        deadline = deadline or self.deadline
+        sources = self.sources
+        if stores:
+            wanted = {store.lower() for store in stores}
+            sources = [s for s in self.sources if s['name'].lower() in wanted]
+
+        timeout = min(self.timeout, deadline)
+        outcomes = await self._gather({
+            source['name']: self._timed_scrape_async(source, product_name, timeout) for source in sources
+        }, deadline)
+
+        results = []
+        for source in sources:
+            price, status, latency_ms = outcomes[source['name']]
+            results.append({
+                'store': source['name'],
+                'price': round(price, 2) if price else None,
+                'latency_ms': latency_ms,
+                'status': status
+            })
+
+        answered = sum(1 for r in results if r['price'])
+        logger.info("Multi-store lookup for %s: %d/%d stores answered", product_name, answered, len(results))
+        return results
+
+    async def get_many_product_prices_async(self, product_names, store=None, deadline=None, use_fallback=True):
+        """Prices for many products from one store (Amazon by default), as in get_many_product_prices."""
+        source = self.find_source(store) if store else self.sources[0]
+        if source is None:
+            raise ValueError(f"Store {store} not found in sources")
+
+        deadline = deadline or self.deadline
+        timeout = min(self.timeout, deadline)
+        outcomes = await self._gather({
+            name: self._timed_scrape_async(source, name, timeout) for name in set(product_names)
+        }, deadline)
+
+        results = {}
+        for name, (price, status, latency_ms) in outcomes.items():
+            if price:
+                price = round(price, 2)
+            results[name] = {'price': price, 'store': source['name'], 'status': status, 'latency_ms': latency_ms}
+        if use_fallback:
+            self._apply_fallbacks(results)
+
+        answered = sum(1 for r in results.values() if r['status'] in ('ok', 'cached'))
+        logger.info("Batch lookup on %s: %d/%d products scraped", source['name'], answered, len(results))
+        return results
+
+    # Synchronous interface of PriceService, bridged onto the event loop.
+    # get_product_price and compare_prices are inherited and go through these.
+
+    def scrape_price(self, source, product_name, timeout=None):
+        return self.bridge.run(self.scrape_price_async(source, product_name, timeout))
+
+    def get_prices_from_all_stores(self, product_name, deadline=None, stores=None):
+        return self.bridge.run(self.get_prices_from_all_stores_async(product_name, deadline, stores))
+
+    def get_many_product_prices(self, product_names, store=None, deadline=None, use_fallback=True):
+        return self.bridge.run(self.get_many_product_prices_async(product_names, store, deadline, use_fallback))
@@ -0,0 +1,263 @@
+"""Price element extraction from store search pages.
+
+Every store selector in PriceService.sources is a chain of descendant
+compound selectors (``.a-price .a-offscreen``, ``.priceView-customer-price span``),
+which lets us avoid building a full BeautifulSoup tree for each page:
+
+- ``lxml``: parses in C and evaluates an XPath translation of the selector.
+- ``selectolax``: used when installed; fastest of the tree-building parsers.
+- ``scan``: a pure-Python streaming scan that stops at the first match and
+  skips the page entirely when the target class never appears in it.
+- ``soup``: the original BeautifulSoup path, always available as the fallback.
+"""
+import logging
+import re
+from html.parser import HTMLParser
+
+try:
+    import lxml.html
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    lxml = None
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+_COMPOUND_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?((?:\.[\w-]+)*)$')
+
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+])
+
+logger = logging.getLogger(__name__)
+
+
+def parse_selector(selector):
+    """Split a descendant-only CSS selector into (tag, classes) steps.
+
+    Returns None for anything richer (ids, attributes, child/sibling
+    combinators, pseudo-classes); callers fall back to BeautifulSoup then.
+    """
+    steps = []
+    for part in selector.split():
+        match = _COMPOUND_RE.match(part)
+        if not match:
+            return None
+        tag, classes = match.groups()
+        class_names = frozenset(c for c in classes.split('.') if c)
+        if not tag and not class_names:
+            return None
+        steps.append((tag.lower() if tag else None, class_names))
+    return steps or None
+
+
+def _decode(content):
+    if isinstance(content, bytes):
+        return content.decode('utf-8', errors='replace')
+    return content
+
+
+class SoupExtractor:
+    """Full BeautifulSoup parse; slow but handles any selector."""
+    name = 'soup'
+
+    def extract(self, content, selector):
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, 'html.parser')
+        element = soup.select_one(selector)
+        return element.get_text().strip() if element is not None else None
+
+
+class _FirstMatchFound(Exception):
+    pass
+
+
+class _ScanParser(HTMLParser):
+    """Streams through the document tracking how much of the selector chain is satisfied."""
+
+    def __init__(self, steps):
+        super().__init__(convert_charrefs=True)
+        self.steps = steps
+        # Open elements as (tag, number of selector steps matched at this depth)
+        self.stack = []
+        self.capture_depth = None
+        self.parts = []
+
+    def _matches(self, step, tag, attrs):
+        step_tag, step_classes = step
+        if step_tag and step_tag != tag:
+            return False
+        if step_classes:
+            classes = next((value for key, value in attrs if key == 'class'), None) or ''
+            if not step_classes.issubset(classes.split()):
+                return False
+        return True
+
+    def handle_starttag(self, tag, attrs):
+        if self.capture_depth is not None:
+            if tag not in VOID_ELEMENTS:
+                self.stack.append((tag, len(self.steps)))
+            return
+
+        matched = self.stack[-1][1] if self.stack else 0
+        if self._matches(self.steps[matched], tag, attrs):
+            matched += 1
+
+        if tag in VOID_ELEMENTS:
+            if matched == len(self.steps):
+                raise _FirstMatchFound()
+            return
+
+        self.stack.append((tag, matched))
+        if matched == len(self.steps):
+            self.capture_depth = len(self.stack)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            self.handle_starttag(tag, attrs)
+        else:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed elements by popping back to the matching open tag
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                del self.stack[index:]
+                break
+        else:
+            return
+
+        if self.capture_depth is not None and len(self.stack) < self.capture_depth:
+            raise _FirstMatchFound()
+
+    def handle_data(self, data):
+        if self.capture_depth is not None:
+            self.parts.append(data)
+
+
+class ScanExtractor:
+    """Targeted streaming scan that stops at the first element matching the selector."""
+    name = 'scan'
+
+    def extract(self, content, selector):
+        steps = parse_selector(selector)
+        if steps is None:
+            raise ValueError(f"Unsupported selector for scan extractor: {selector}")
+
+        text = _decode(content)
+        # Skip the parse entirely when the target element's class never occurs
+        if any(class_name not in text for class_name in steps[-1][1]):
+            return None
+
+        parser = _ScanParser(steps)
+        try:
+            parser.feed(text)
+            parser.close()
+        except _FirstMatchFound:
+            return ''.join(parser.parts).strip()
+
+        if parser.capture_depth is not None:
+            # Document ended while the matched element was still open
+            return ''.join(parser.parts).strip()
+        return None
+
+
+def selector_to_xpath(selector):
+    """Translate a descendant-only selector into an equivalent XPath expression."""
+    steps = parse_selector(selector)
+    if steps is None:
+        raise ValueError(f"Unsupported selector for XPath translation: {selector}")
+
+    xpath = ''
+    for tag, classes in steps:
+        predicates = ''.join(
+            f"[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+            for class_name in sorted(classes)
+        )
+        xpath += f"//{tag or '*'}{predicates}"
+    return f"({xpath})[1]"
+
+
+class LxmlExtractor:
+    """lxml's C parser plus an XPath translation of the selector."""
+    name = 'lxml'
+
+    def __init__(self):
+        self._xpaths = {}
+
+    def extract(self, content, selector):
+        xpath = self._xpaths.get(selector)
+        if xpath is None:
+            xpath = self._xpaths[selector] = selector_to_xpath(selector)
+
+        if not content:
+            return None
+        document = lxml.html.fromstring(content)
+        elements = document.xpath(xpath)
+        return elements[0].text_content().strip() if elements else None
+
+
+class SelectolaxExtractor:
+    """selectolax (lexbor/modest) parser with native CSS selectors."""
+    name = 'selectolax'
+
+    def extract(self, content, selector):
+        node = SelectolaxParser(content).css_first(selector)
+        return node.text().strip() if node is not None else None
+
+
+class FallbackExtractor:
+    """Try a fast extractor first and fall back to BeautifulSoup if it can't handle the page."""
+
+    def __init__(self, fast):
+        self.fast = fast
+        self.fallback = SoupExtractor()
+        self.name = f"{fast.name}+soup"
+
+    def extract(self, content, selector):
+        try:
+            return self.fast.extract(content, selector)
+        except Exception as e:
+            logger.warning("%s extractor failed (%s), falling back to BeautifulSoup", self.fast.name, e)
+            return self.fallback.extract(content, selector)
+
+
+EXTRACTORS = {
+    'soup': SoupExtractor,
+    'scan': ScanExtractor,
+    'lxml': LxmlExtractor,
+    'selectolax': SelectolaxExtractor,
+}
+
+
+def available_extractors():
+    """Names of the extractors usable in this environment."""
+    names = ['soup', 'scan']
+    if lxml is not None:
+        names.append('lxml')
+    if SelectolaxParser is not None:
+        names.append('selectolax')
+    return names
+
+
+def get_extractor(name='auto'):
+    """Build the named extractor, or the fastest available one for 'auto'.
+
+    Everything except 'soup' is wrapped so that it falls back to BeautifulSoup.
+    """
+    if name == 'auto':
+        if SelectolaxParser is not None:
+            name = 'selectolax'
+        elif lxml is not None:
+            name = 'lxml'
+        else:
+            name = 'scan'
+
+    if name not in available_extractors():
+        raise ValueError(f"Extractor '{name}' is not available")
+    if name == 'soup':
+        return SoupExtractor()
+    return FallbackExtractor(EXTRACTORS[name]())
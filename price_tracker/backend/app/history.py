@@ -0,0 +1,122 @@
+from app import db
+from sqlalchemy import func
+from app.models import Product, PriceHistory
+from app.rollups import record_prices
+from datetime import datetime
+
+def insert_price_history(rows):
+    """Write many PriceHistory rows with a single executemany in the current transaction.
+
+    The price rollups are updated in the same transaction. The caller commits,
+    so the rows land atomically with whatever else it wrote.
+    """
+    if rows:
+        db.session.execute(PriceHistory.__table__.insert(), rows)
+        record_prices(rows)
+    return len(rows)
+
+def record_price_updates(prices, now=None):
+    """Apply many refreshed prices at once: update current_price and append history rows.
+
+    prices maps product id -> new price. Everything goes into the caller's
+    transaction, so a whole batch lands with one commit.
+    """
+    now = now or datetime.utcnow()
+    if not prices:
+        return 0
+    db.session.bulk_update_mappings(Product, [
+        {'id': product_id, 'current_price': price} for product_id, price in prices.items()
+    ])
+    return insert_price_history([
+        {'product_id': product_id, 'price': price, 'timestamp': now} for product_id, price in prices.items()
+    ])
+
+def seed_price_history(product_id, price, now=None):
+    """Backfill synthetic history for a product; returns the number of rows written."""
+    # Deferred so numpy is only loaded once a product is actually created
+    from app.synthetic_history import seed_rows
+    return insert_price_history(seed_rows(product_id, price, now))
+
+# Chart bucket used when downsampling each period server-side
+PERIOD_BUCKETS = {
+    'today': 'hour',
+    'week': 'day',
+    'month': 'day',
+    'year': 'week',
+}
+
+_SQLITE_BUCKET_FORMATS = {
+    'hour': '%Y-%m-%d %H',
+    'day': '%Y-%m-%d',
+    'month': '%Y-%m',
+}
+
+def bucket_key(column, granularity):
+    """SQL expression grouping timestamps into hour/day/week/month buckets for the active dialect."""
+    if db.engine.dialect.name == 'sqlite':
+        if granularity == 'week':
+            # The Monday starting the week, as date_trunc('week') gives; '%Y-%W' splits a week at new year
+            return func.strftime('%Y-%m-%d', column, 'weekday 0', '-6 days')
+        return func.strftime(_SQLITE_BUCKET_FORMATS[granularity], column)
+    return func.date_trunc(granularity, column)
+
+def price_stats(product_id, start_date):
+    """Count, average, min and max price since start_date, computed in SQL."""
+    count, average, minimum, maximum = db.session.query(
+        func.count(PriceHistory.id),
+        func.avg(PriceHistory.price),
+        func.min(PriceHistory.price),
+        func.max(PriceHistory.price)
+    ).filter(
+        PriceHistory.product_id == product_id,
+        PriceHistory.timestamp >= start_date
+    ).one()
+    return {'count': count, 'average': average, 'min': minimum, 'max': maximum}
+
+def price_points(product_id, start_date):
+    """Raw history points since start_date as dicts, without loading ORM objects."""
+    rows = db.session.query(
+        PriceHistory.id, PriceHistory.price, PriceHistory.timestamp
+    ).filter(
+        PriceHistory.product_id == product_id,
+        PriceHistory.timestamp >= start_date
+    ).order_by(PriceHistory.timestamp)
+    return [
+        {'id': id_, 'product_id': product_id, 'price': price, 'timestamp': timestamp.isoformat()}
+        for id_, price, timestamp in rows
+    ]
+
+def downsampled_price_points(product_id, start_date, granularity):
+    """One averaged point per bucket since start_date, grouped in SQL.
+
+    Each point is stamped with the first timestamp seen in its bucket.
+    """
+    bucket = bucket_key(PriceHistory.timestamp, granularity).label('bucket')
+    rows = db.session.query(
+        func.min(PriceHistory.timestamp),
+        func.avg(PriceHistory.price),
+        func.min(PriceHistory.price),
+        func.max(PriceHistory.price),
+        func.count(PriceHistory.id)
+    ).filter(
+        PriceHistory.product_id == product_id,
+        PriceHistory.timestamp >= start_date
+    ).group_by(bucket).order_by(func.min(PriceHistory.timestamp))
+    return [
+        {
+            'id': None,
+            'product_id': product_id,
+            'price': round(average, 2),
+            'min_price': minimum,
+            'max_price': maximum,
+            'count': count,
+            'timestamp': _as_datetime(first_seen).isoformat()
+        }
+        for first_seen, average, minimum, maximum, count in rows
+    ]
+
+def _as_datetime(value):
+    # SQLite hands back aggregate datetimes as strings since the column type is lost
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
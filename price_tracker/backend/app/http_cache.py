@@ -0,0 +1,80 @@
+from app import db
+from app.models import Product, PriceHistory
+from datetime import datetime, timezone
+from flask import current_app, g, make_response, request
+from functools import wraps
+from sqlalchemy import func
+import hashlib
+
+
+def product_fingerprint(product_id):
+    """Latest history id and timestamp for a product: changes whenever a price is written.
+
+    Both maxima are answered from the (product_id, timestamp) index.
+    """
+    latest_id, latest_timestamp = db.session.query(
+        func.max(PriceHistory.id),
+        func.max(PriceHistory.timestamp)
+    ).filter(PriceHistory.product_id == product_id).one()
+    return latest_id, latest_timestamp
+
+
+def _cache_control(shared):
+    # Browsers revalidate every time. Only shared views let the Vercel edge serve a copy for
+    # s-maxage seconds; history and averages are re-read right after a refresh and must not lag
+    if not shared:
+        return 'private, no-cache'
+    return (
+        f"public, max-age=0, s-maxage={current_app.config.get('HTTP_CACHE_S_MAXAGE', 30)}, "
+        f"stale-while-revalidate={current_app.config.get('HTTP_CACHE_STALE_WHILE_REVALIDATE', 60)}"
+    )
+
+
+def _not_modified(etag, last_modified, daily):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    # A daily view changes at midnight without a new write, which a date can't show
+    if daily or last_modified is None or request.if_modified_since is None:
+        return False
+    # HTTP dates have whole seconds: a tie may hide a second write in the same second
+    return last_modified.replace(microsecond=0) < request.if_modified_since
+
+
+def conditional_product_view(daily=False, shared=False):
+    """Answer conditional GETs for a product endpoint before doing the real work.
+
+    The weak ETag is derived from the product row, its latest history
+    id/timestamp and the query string (plus today's date when daily is set,
+    for views whose window moves at midnight). A matching If-None-Match, or
+    an If-Modified-Since strictly after the latest write on a non-daily view,
+    gets a 304 without running the view. Only shared views
+    may be cached by the edge; the rest are revalidated on every request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(product_id, *args, **kwargs):
+            product = Product.query.get_or_404(product_id)
+            latest_id, latest_timestamp = product_fingerprint(product_id)
+            g.product_fingerprint = (latest_id, latest_timestamp)
+
+            parts = [request.path, product.id, product.name, product.current_price, latest_id, latest_timestamp,
+                     sorted(request.args.items(multi=True))]
+            if daily:
+                parts.append(datetime.utcnow().date())
+            etag = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+            last_modified = latest_timestamp.replace(tzinfo=timezone.utc) if latest_timestamp else None
+
+            if _not_modified(etag, last_modified, daily):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(product_id, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = _cache_control(shared)
+            return response
+        return wrapper
+    return decorator
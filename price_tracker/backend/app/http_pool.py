@@ -0,0 +1,116 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class SessionPool:
+    """Keep-alive HTTP sessions shared by every scraping thread, one per store host.
+
+    Each host gets its own requests.Session with a connection pool sized by
+    pool_maxsize, so repeated refreshes reuse the TCP+TLS connection instead of
+    handshaking again. A global semaphore caps the number of sockets that can be
+    in use at once across all hosts.
+
+    429 and 503 are not retried: a store sending them is throttling us, and
+    PriceService's circuit breaker backs off from it instead.
+
+    Time spent opening connections (DNS, TCP and TLS) is tracked per thread,
+    see connect_seconds().
+    """
+
+    def __init__(self, headers=None, pool_maxsize=4, max_total_connections=32,
+                 retries=2, backoff_factor=0.3, status_forcelist=(500, 502, 504)):
+        self.headers = headers or {}
+        self.pool_maxsize = pool_maxsize
+        self.max_total_connections = max_total_connections
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_total_connections)
+        self._local = threading.local()
+
+    def _build_session(self):
+        # requests is only imported once the first store is scraped, keeping it off the cold-start path
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.status_forcelist,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        # pool_block keeps a host from opening more than pool_maxsize sockets
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+            pool_block=True
+        )
+        adapter.poolmanager.pool_classes_by_scheme = self._timed_pool_classes()
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _timed_pool_classes(self):
+        """urllib3 connection pools whose connections add their connect() time to this thread's total."""
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+        local = self._local
+
+        def timed(connection_class):
+            class TimedConnection(connection_class):
+                def connect(self):
+                    started = time.perf_counter()
+                    try:
+                        super().connect()
+                    finally:
+                        local.connect_seconds = getattr(local, 'connect_seconds', 0.0) + time.perf_counter() - started
+            return TimedConnection
+
+        return {
+            'http': type('TimedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': timed(HTTPConnection)}),
+            'https': type('TimedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': timed(HTTPSConnection)}),
+        }
+
+    def session_for(self, url):
+        """Return the shared session for the host of url, creating it on first use."""
+        host = urlsplit(url).netloc.lower()
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._build_session()
+                    self._sessions[host] = session
+        return session
+
+    def get(self, url, timeout=None, **kwargs):
+        """GET url through its host's pooled session, bounded by the global socket cap."""
+        session = self.session_for(url)
+        self._local.connect_seconds = 0.0
+        with self._slots:
+            return session.get(url, timeout=timeout, **kwargs)
+
+    def connect_seconds(self):
+        """Time this thread's last get() spent opening new connections (0 when one was reused)."""
+        return getattr(self._local, 'connect_seconds', 0.0)
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,36 @@
+"""Leveled, non-blocking logging for the app.
+
+Records from the app's loggers go onto an in-memory queue; one listener thread
+writes them to stderr, so request and scrape threads never block on the
+stream. LOG_LEVEL sets the level (DEBUG shows every scrape and request).
+"""
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_listener = None
+
+
+def configure_logging(app):
+    """Route the 'app' loggers through a queue at the configured level (once per process)."""
+    global _listener
+
+    logger = logging.getLogger('app')
+    logger.setLevel(app.config.get('LOG_LEVEL', 'INFO').upper())
+    if _listener is not None:
+        return
+
+    records = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(FORMAT))
+    _listener = QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(_listener.stop)
+
+    logger.addHandler(QueueHandler(records))
+    logger.propagate = False
@@ -0,0 +1,228 @@
+"""Prometheus metrics for the web process: request timing, DB queries per request, scrape phases.
+
+Counters and histograms live in this process and are rendered in the
+Prometheus text format by /metrics, together with gauges read from the
+caches' and guards' stats() at scrape time. Every app worker (and
+serverless instance) reports its own numbers; Prometheus sums them.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers a cached lookup (~1 ms) up to a multi-store deadline
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            yield self.name + _labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        # Index of the first bucket whose upper bound is >= value; len(buckets) means +Inf only
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket' + _labels(self.labelnames, key, [('le', _number(bound))]), cumulative
+            yield self.name + '_sum' + _labels(self.labelnames, key), total
+            yield self.name + '_count' + _labels(self.labelnames, key), cumulative
+
+
+class Registry:
+    """The metrics of one process, plus collectors for values that are read when rendered."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, collect):
+        """Register collect(), returning (name, type, help, [(labels dict, value), ...]) families."""
+        self._collectors.append(collect)
+        return collect
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{sample} {_number(value)}' for sample, value in metric.samples())
+        for collect in self._collectors:
+            for name, kind, documentation, samples in collect():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_labels(labels.keys(), labels.values())} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests by method, route and status code.', ('method', 'route', 'status'))
+http_request_seconds = registry.histogram(
+    'http_request_duration_seconds', 'Time to handle a request, by method and route.', ('method', 'route'))
+http_request_queries = registry.histogram(
+    'http_request_db_queries', 'Database queries run while handling a request, by route.', ('route',), COUNT_BUCKETS)
+http_request_query_seconds = registry.histogram(
+    'http_request_db_seconds', 'Time spent in database queries while handling a request, by route.', ('route',))
+db_query_seconds = registry.histogram(
+    'db_query_duration_seconds', 'Time of every database query, in requests, the writer thread and the refresh worker.',
+    buckets=QUERY_BUCKETS)
+scrapes = registry.counter(
+    'scrapes_total', 'Store scrapes by store and status (cache hits are not counted).', ('store', 'status'))
+scrape_phase_seconds = registry.histogram(
+    'scrape_phase_duration_seconds',
+    'Time per scrape phase by store: wait (rate limit), dns, connect (new connections only), fetch, parse.',
+    ('store', 'phase'))
+
+# Queries of the request being handled on this thread
+_request_queries = threading.local()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    db_query_seconds.observe(elapsed)
+    totals = getattr(_request_queries, 'totals', None)
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += elapsed
+
+
+def _handle_error(context):
+    # A failed query never reaches after_cursor_execute
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine):
+    """Time every query run on engine."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+
+def _route():
+    # The URL rule, not the path, so /api/products/1 and /api/products/2 are one series
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    _request_queries.totals = [0, 0.0]
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc=None):
+    # Teardown runs after streamed responses finish, so their queries and time are included
+    started = g.pop('metrics_started', None)
+    totals = getattr(_request_queries, 'totals', None)
+    _request_queries.totals = None
+    if started is None:
+        return
+    route = _route()
+    status = g.pop('metrics_status', 500)
+    http_requests.inc(method=request.method, route=route, status=status)
+    http_request_seconds.observe(time.perf_counter() - started, method=request.method, route=route)
+    if totals is not None:
+        http_request_queries.observe(totals[0], route=route)
+        http_request_query_seconds.observe(totals[1], route=route)
+
+
+def init_app(app):
+    """Time the app's requests and queries; call inside an app context (the engine is needed)."""
+    from app import db
+
+    instrument_engine(db.engine)
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
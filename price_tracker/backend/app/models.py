@@ -1,13 +1,32 @@
 from app import db
+from app.postgres_profile import PRICE_HISTORY_BRIN, PRODUCT_NAME_TRGM
+from app.sqlite_profile import PRODUCT_FTS, sqlite_has_fts5
+from app.normalization import canonical_key
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import validates
 
 class Product(db.Model):
+    # One product per canonical name; adding it again under another spelling finds this row
+    __table_args__ = (
+        db.Index('uq_product_canonical_key', 'canonical_key', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    canonical_key = db.Column(db.String(100))  # Set from name, see app/normalization.py
     current_price = db.Column(db.Float)
+    # Set by the refresh worker on every scrape attempt; failures counts consecutive misses for backoff
+    refresh_attempted_at = db.Column(db.DateTime)
+    refresh_failures = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     price_histories = db.relationship('PriceHistory', backref='product', lazy=True)
     search_histories = db.relationship('SearchHistory', backref='product', lazy=True)
     
+    @validates('name')
+    def set_canonical_key(self, key, name):
+        self.canonical_key = canonical_key(name)
+        return name
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -15,7 +34,18 @@ class Product(db.Model):
             'current_price': self.current_price
         }
 
+# Name search index, created along with the table (migration 0005 adds it to existing databases)
+for ddl in PRODUCT_FTS:
+    event.listen(Product.__table__, 'after_create', ddl.execute_if(callable_=sqlite_has_fts5))
+for ddl in PRODUCT_NAME_TRGM:
+    event.listen(Product.__table__, 'after_create', ddl.execute_if(dialect='postgresql'))
+
 class PriceHistory(db.Model):
+    # Chart queries filter on product_id plus a timestamp range and sort by timestamp
+    __table_args__ = (
+        db.Index('ix_price_history_product_id_timestamp', 'product_id', 'timestamp'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     price = db.Column(db.Float, nullable=False)
@@ -26,10 +56,20 @@ class PriceHistory(db.Model):
             'id': self.id,
             'product_id': self.product_id,
             'price': self.price,
-            'timestamp': self.timestamp.isoformat()
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
 
+# Postgres only: BRIN index on timestamp, created along with the table (migration 0004 adds it to existing ones)
+event.listen(PriceHistory.__table__, 'after_create', PRICE_HISTORY_BRIN.execute_if(dialect='postgresql'))
+
 class SearchHistory(db.Model):
+    # /api/search_history lists the newest searches first; the refresh worker and
+    # product deletes look searches up by product
+    __table_args__ = (
+        db.Index('ix_search_history_timestamp', 'timestamp'),
+        db.Index('ix_search_history_product_id', 'product_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -39,6 +79,39 @@ class SearchHistory(db.Model):
         return {
             'id': self.id,
             'product_id': self.product_id,
-            'timestamp': self.timestamp.isoformat(),
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
             'user_id': self.user_id
-        } 
\ No newline at end of file
+        } 
+
+class PriceRollup(db.Model):
+    """Pre-aggregated prices per product and hour/day/month bucket, kept up to date on write."""
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'granularity', 'bucket_start', name='uq_price_rollup_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    granularity = db.Column(db.String(8), nullable=False)  # 'hour', 'day' or 'month'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)  # Sum of prices, so averages can be updated incrementally
+    min_price = db.Column(db.Float, nullable=False)
+    max_price = db.Column(db.Float, nullable=False)
+    last_price = db.Column(db.Float, nullable=False)
+    last_timestamp = db.Column(db.DateTime, nullable=False)
+    
+    @property
+    def average_price(self):
+        return self.total / self.count if self.count else None
+    
+    def to_dict(self):
+        return {
+            'id': None,
+            'product_id': self.product_id,
+            'price': round(self.average_price, 2),
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'count': self.count,
+            'last_price': self.last_price,
+            'timestamp': self.bucket_start.isoformat()
+        }
@@ -0,0 +1,41 @@
+"""Canonical product-name keys, so one product isn't added (and scraped) once per spelling.
+
+canonical_key("iPhone 15 Pro 256 GB ") == canonical_key("iphone 15 pro 256gb")
+== "iphone 15 pro 256gb": Unicode compatibility forms are folded, everything is
+lowercased, separators (- _ / , ( ) etc.) become spaces, runs of whitespace
+collapse, and a number followed by a unit is written as one token with the
+unit's short form ("256 gb", "256 GB", "256 gigabytes" -> "256gb"; "1 TB" ->
+"1tb"; '55"' / "55 inch" -> "55in") - the tokens generate_fallback_price matches.
+"""
+import re
+import unicodedata
+
+# Unit spellings -> short form, for units written after a number. Bare "in" and "w"
+# are left alone ("15 in black", "15 w/ case")
+UNITS = {
+    'gb': 'gb', 'gig': 'gb', 'gigs': 'gb', 'gigabyte': 'gb', 'gigabytes': 'gb',
+    'tb': 'tb', 'terabyte': 'tb', 'terabytes': 'tb',
+    'mb': 'mb', 'megabyte': 'mb', 'megabytes': 'mb',
+    'inch': 'in', 'inches': 'in', '"': 'in', '”': 'in', "''": 'in',
+    'mm': 'mm', 'hz': 'hz', 'ghz': 'ghz', 'mah': 'mah', 'watt': 'w', 'watts': 'w',
+}
+
+# Longest spellings first so "gigabytes" wins over "gig"; a word unit must end at a word boundary
+_UNIT_PATTERN = '|'.join(
+    re.escape(unit) + ('' if unit in ('"', '”', "''") else r'\b')
+    for unit in sorted(UNITS, key=len, reverse=True)
+)
+_NUMBER_UNIT = re.compile(r'(\d+(?:\.\d+)?)\s*(' + _UNIT_PATTERN + ')')
+
+# Separators that don't change what product is meant; '+' ("S24+") and '.' in numbers are kept
+_SEPARATORS = re.compile(r'[\s\-_/\\,;:|()\[\]{}–—]+')
+
+
+def canonical_key(name):
+    """Normalized form of a product name used to find an existing product."""
+    key = unicodedata.normalize('NFKC', name or '').lower()
+    key = _NUMBER_UNIT.sub(lambda m: m.group(1) + UNITS[m.group(2)], key)
+    key = _SEPARATORS.sub(' ', key)
+    # Periods that aren't decimal points ("Galaxy S24 Ultra.")
+    key = re.sub(r'\.(?!\d)|(?<!\d)\.', ' ', key)
+    return ' '.join(key.split())
@@ -0,0 +1,142 @@
+from flask import Response, json, request, stream_with_context
+from sqlalchemy import and_, or_
+from datetime import datetime
+from urllib.parse import urlencode
+import base64
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Opaque cursor for the last row of a page: its sort key values (NULL as null)."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """Reverse encode_cursor, converting each value with the matching entry in types."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if len(values) != len(types):
+            raise ValueError('wrong number of values')
+        return [
+            None if v is None else datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        ]
+    except (ValueError, TypeError) as e:
+        raise PaginationError(f"Invalid cursor: {str(e)}")
+
+
+def page_args():
+    """Read ?limit and ?cursor. Returns (limit, cursor); limit is None when not paginating."""
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is None and cursor is None:
+        return None, None
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE), cursor
+
+
+def ordering(columns, descending=False):
+    """ORDER BY terms for columns. NULLs sort as the largest value on every database
+    (Postgres' own order, so its indexes still apply), which after() relies on."""
+    terms = []
+    for column in columns:
+        if not column.nullable:
+            terms.append(column.desc() if descending else column)
+        else:
+            terms.append(column.desc().nulls_first() if descending else column.asc().nulls_last())
+    return terms
+
+
+def after(columns, values, descending=False):
+    """Keyset filter selecting rows strictly after values in ordering(columns) order."""
+    clauses = []
+    for i, column in enumerate(columns):
+        # == None renders IS NULL, so rows sharing a NULL prefix match too
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        if values[i] is None:
+            # Descending, NULLs came first and every value follows; ascending, nothing does
+            if not descending:
+                continue
+            beyond = column.isnot(None)
+        elif descending:
+            beyond = column < values[i]
+        else:
+            beyond = or_(column > values[i], column.is_(None)) if column.nullable else column > values[i]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def keyset_page(query, columns, cursor_types, serialize, key, descending=False):
+    """Run one keyset-paginated page of query and build the JSON response.
+
+    The body stays a plain JSON array; the next page is announced through the
+    X-Next-Cursor header and a Link rel="next" header.
+    """
+    limit, cursor = page_args()
+    if cursor:
+        query = query.filter(after(columns, decode_cursor(cursor, cursor_types), descending))
+    rows = query.order_by(*ordering(columns, descending)).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    response = Response(json.dumps([serialize(row) for row in rows]), mimetype='application/json')
+    if has_more:
+        next_cursor = encode_cursor(key(rows[-1]))
+        args = request.args.to_dict()
+        args.update(cursor=next_cursor, limit=str(limit))
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def wants_stream():
+    """True when the client asked for ?format=ndjson or ?stream=true."""
+    return request.args.get('format') == 'ndjson' or request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_rows(query, serialize):
+    """Stream every row of query as NDJSON or as one JSON array, fetching in batches.
+
+    Rows are pulled from a server-side cursor, so a full export never holds
+    every ORM object in memory at once.
+    """
+    rows = query.execution_options(stream_results=True).yield_per(STREAM_BATCH_SIZE)
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for row in rows:
+                yield json.dumps(serialize(row)) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    def generate():
+        yield '['
+        first = True
+        for row in rows:
+            yield ('' if first else ',') + json.dumps(serialize(row))
+            first = False
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def list_response(query, columns, cursor_types, serialize, key, descending=False):
+    """Serve a list endpoint as a full JSON array, a keyset page (?limit/?cursor) or a stream."""
+    order = ordering(columns, descending)
+    if wants_stream():
+        return stream_rows(query.order_by(*order), serialize)
+    if page_args()[0] is not None:
+        return keyset_page(query, columns, cursor_types, serialize, key, descending)
+    return Response(json.dumps([serialize(row) for row in query.order_by(*order)]), mimetype='application/json')
@@ -0,0 +1,52 @@
+from sqlalchemy import DDL
+from sqlalchemy.engine import make_url
+
+
+def is_postgres(uri):
+    return make_url(uri).get_backend_name() == 'postgresql'
+
+
+def configure_postgres(app):
+    """Connection pool and per-session limits for a Postgres database. Call before db.init_app.
+
+    Each app worker keeps its own pool, so DB_POOL_SIZE + DB_MAX_OVERFLOW times
+    the number of workers must stay under the server's max_connections.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not is_postgres(uri):
+        return
+
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_size', app.config.get('DB_POOL_SIZE', 5))
+    options.setdefault('max_overflow', app.config.get('DB_MAX_OVERFLOW', 10))
+    options.setdefault('pool_timeout', app.config.get('DB_POOL_TIMEOUT_SECONDS', 10))
+    # Recycle before server-side idle timeouts and proxies (e.g. PgBouncer) drop the connection
+    options.setdefault('pool_recycle', app.config.get('DB_POOL_RECYCLE_SECONDS', 1800))
+    options.setdefault('pool_pre_ping', app.config.get('DB_POOL_PRE_PING', True))
+
+    if make_url(uri).get_driver_name() == 'psycopg2':
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args.setdefault('connect_timeout', app.config.get('DB_CONNECT_TIMEOUT_SECONDS', 5))
+        connect_args.setdefault('application_name', app.config.get('DB_APPLICATION_NAME', 'price-tracker'))
+        # A runaway query or a request that dies mid-transaction can't hold locks forever
+        connect_args.setdefault('options', (
+            f"-c statement_timeout={int(app.config.get('DB_STATEMENT_TIMEOUT_MS', 15000))} "
+            f"-c idle_in_transaction_session_timeout={int(app.config.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', 60000))}"
+        ))
+        options['connect_args'] = connect_args
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+# price_history is append-only, so rows are physically ordered by timestamp: a BRIN index
+# covers time-range scans across all products at a fraction of a btree's size
+PRICE_HISTORY_BRIN = DDL(
+    "CREATE INDEX IF NOT EXISTS ix_price_history_timestamp_brin "
+    "ON price_history USING brin (timestamp)"
+)
+
+# Trigram index for product-name search (see app/product_search.py); it serves both
+# similarity ranking and LIKE '%word%' filters
+PRODUCT_NAME_TRGM = [
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+    DDL("CREATE INDEX IF NOT EXISTS ix_product_name_trgm ON product USING gin (lower(name) gin_trgm_ops)"),
+]
@@ -1,13 +1,30 @@
-import requests
-from bs4 import BeautifulSoup
-import random
 import time
-import hashlib
 import re
 import concurrent.futures
+import logging
+import threading
+from app.http_pool import SessionPool
+from app.resilience import StoreGuards, is_store_failure, looks_blocked
+from app.single_flight import SingleFlight
+from app.pricing_rules import PricingRules
+from app.scrape_cache import ScrapeCache, SqliteCacheBackend, MISS
+from app.metrics import scrapes, scrape_phase_seconds
+
+logger = logging.getLogger(__name__)
 
 class PriceService:
-    def __init__(self):
+    def __init__(self, max_workers=8, deadline=8.0, timeout=10, store_concurrency=2):
+        # Per-request scrape timeout and the overall deadline for multi-store lookups
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        # Cap on concurrent scrapes against any one store during batch lookups
+        self.store_concurrency = store_concurrency
+        self._store_slots = {}
+        
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept-Language': 'en-US,en;q=0.9',
@@ -36,6 +53,24 @@ class PriceService:
             'monitor': 249.99,
             'camera': 499.99,
         }
+        # These and the model/storage/generation rules in app/pricing_rules.py, flattened once
+        self.pricing = PricingRules(self.product_base_prices)
+        
+        # Keep-alive sessions shared by all scraping threads, one pool per store host
+        self.http = SessionPool(headers=self.headers)
+        
+        # Recent scrape results (including failures) keyed by store and normalized name
+        self.cache = ScrapeCache()
+        
+        # Concurrent cache misses for the same store and product share one scrape
+        self.inflight = SingleFlight()
+        
+        # Per-store request rate limit and circuit breaker, so a failing store is skipped instead of waited on
+        self.guards = StoreGuards()
+        
+        # Fastest available price extractor, falling back to BeautifulSoup; built on first scrape
+        self.extractor_name = 'auto'
+        self._extractor = None
         
         # Price scraper sources
         self.sources = [
@@ -61,36 +96,300 @@ class PriceService:
         except (ValueError, TypeError):
             return None
     
-    def scrape_price(self, source, product_name):
+    def init_app(self, app):
+        """Apply scraping settings from the Flask config."""
+        self.timeout = app.config.get('SCRAPE_TIMEOUT_SECONDS', self.timeout)
+        self.deadline = app.config.get('SCRAPE_DEADLINE_SECONDS', self.deadline)
+        self.max_workers = app.config.get('SCRAPE_MAX_WORKERS', self.max_workers)
+        self.store_concurrency = app.config.get('SCRAPE_STORE_CONCURRENCY', self.store_concurrency)
+        
+        self.http.close()
+        self.http = SessionPool(
+            headers=self.headers,
+            pool_maxsize=app.config.get('SCRAPE_POOL_MAXSIZE', 4),
+            max_total_connections=app.config.get('SCRAPE_MAX_CONNECTIONS', 32),
+            retries=app.config.get('SCRAPE_RETRIES', 2),
+            backoff_factor=app.config.get('SCRAPE_RETRY_BACKOFF', 0.3)
+        )
+        
+        backend = None
+        if app.config.get('SCRAPE_CACHE_BACKEND') == 'sqlite':
+            backend = SqliteCacheBackend(app.config['SCRAPE_CACHE_PATH'])
+        self.cache = ScrapeCache(
+            ttl=app.config.get('SCRAPE_CACHE_TTL', 900),
+            negative_ttl=app.config.get('SCRAPE_CACHE_NEGATIVE_TTL', 120),
+            max_size=app.config.get('SCRAPE_CACHE_SIZE', 1024),
+            backend=backend
+        )
+        self.guards = StoreGuards(
+            rate=app.config.get('SCRAPE_RATE_LIMIT_PER_SECOND', 4.0),
+            burst=app.config.get('SCRAPE_RATE_LIMIT_BURST', 8),
+            max_wait=app.config.get('SCRAPE_RATE_LIMIT_MAX_WAIT_SECONDS', 2.0),
+            failure_threshold=app.config.get('SCRAPE_BREAKER_FAILURE_THRESHOLD', 5),
+            reset_timeout=app.config.get('SCRAPE_BREAKER_RESET_SECONDS', 30.0)
+        )
+        self.extractor_name = app.config.get('SCRAPE_EXTRACTOR', 'auto')
+        self._extractor = None
+    
+    @property
+    def extractor(self):
+        """Price extractor, created on first use so HTML parsers aren't imported at startup."""
+        if self._extractor is None:
+            with self._executor_lock:
+                if self._extractor is None:
+                    from app.extractors import get_extractor
+                    self._extractor = get_extractor(self.extractor_name)
+        return self._extractor
+    
+    @property
+    def executor(self):
+        """Bounded thread pool shared by all multi-store lookups, created on first use."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='price-scrape'
+                    )
+        return self._executor
+    
+    def find_source(self, store):
+        """Look up a store in sources by name (case-insensitive)."""
+        return next((s for s in self.sources if s['name'].lower() == store.lower()), None)
+    
+    def scrape_price(self, source, product_name, timeout=None):
         """Scrape price from a single source."""
+        price, _ = self._cached_scrape(source, product_name, timeout)
+        return price
+    
+    def _cached_scrape(self, source, product_name, timeout=None):
+        """Serve a scrape from the cache when possible, caching fresh results and failures."""
+        cached = self.cache.get(source['name'], product_name)
+        if cached is not MISS:
+            return cached, 'cached' if cached is not None else 'cached_failure'
+        
+        key = self.cache.key(source['name'], product_name)
+        return self.inflight.do(key, self._fresh_scrape, source, product_name, timeout)
+    
+    def _fresh_scrape(self, source, product_name, timeout=None):
+        """Scrape through the store's guards and cache the result."""
+        wait, refused = self._admit(source, timeout)
+        if refused:
+            # Not cached: the store is retried as soon as the breaker or rate limit allows
+            return None, refused
+        if wait:
+            time.sleep(wait)
+        self._observe(source, wait=wait)
+        price, status = self._scrape(source, product_name, timeout)
+        self._record(source, status)
+        self.cache.set(source['name'], product_name, price)
+        return price, status
+    
+    def _admit(self, source, timeout=None):
+        """
+        Check a store's circuit breaker and rate limiter before scraping it.
+        Returns (seconds to wait before the request, None), or (None, status) when the
+        scrape must be skipped: 'circuit_open' while the store is failing, 'rate_limited'
+        when no request slot frees up within the wait budget.
+        """
+        bucket, breaker = self.guards.get(source['name'])
+        if not breaker.allow():
+            logger.info("Circuit open for %s, skipping scrape", source['name'])
+            scrapes.inc(store=source['name'], status='circuit_open')
+            return None, 'circuit_open'
+        
+        wait = bucket.reserve(min(self.guards.max_wait, timeout or self.timeout))
+        if wait is None:
+            breaker.release()
+            logger.warning("Rate limit reached for %s, skipping scrape", source['name'])
+            scrapes.inc(store=source['name'], status='rate_limited')
+            return None, 'rate_limited'
+        return wait, None
+    
+    def _observe(self, source, **phases):
+        """Record a scrape's phase durations (seconds) in the store's metrics; None is skipped."""
+        for phase, seconds in phases.items():
+            if seconds is not None:
+                scrape_phase_seconds.observe(seconds, store=source['name'], phase=phase)
+    
+    def _record(self, source, status):
+        """Feed a scrape's outcome to the store's circuit breaker and the scrape metrics."""
+        scrapes.inc(store=source['name'], status=status)
+        _, breaker = self.guards.get(source['name'])
+        if is_store_failure(status):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    
+    def _scrape(self, source, product_name, timeout=None):
+        """Scrape a single source and return a (price, status) tuple."""
+        import requests
+        
         try:
             url = source['url'].format(query=product_name.replace(' ', '+'))
-            response = requests.get(url, headers=self.headers, timeout=10)
+            started = time.perf_counter()
+            response = self.http.get(url, timeout=timeout or self.timeout)
+            content = response.content
+            fetched = time.perf_counter()
+            connect = self.http.connect_seconds()
+            # A reused keep-alive connection has no connect phase
+            self._observe(source, connect=connect or None, fetch=fetched - started - connect)
             
             if response.status_code != 200:
-                print(f"Failed to fetch from {source['name']}: Status code {response.status_code}")
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            price_element = soup.select_one(source['price_selector'])
+                logger.warning("Failed to fetch from %s: Status code %s", source['name'], response.status_code)
+                return None, f"http_{response.status_code}"
             
-            if not price_element:
-                print(f"No price element found for {source['name']}")
-                return None
+            result = self.parse_price(source, content)
+            self._observe(source, parse=time.perf_counter() - fetched)
+            return result
                 
-            price_text = price_element.get_text().strip()
-            price = self.extract_price(price_text)
+        except requests.Timeout:
+            logger.warning("Timed out scraping %s", source['name'])
+            return None, 'timeout'
+        except Exception as e:
+            logger.warning("Error scraping %s: %s", source['name'], e)
+            return None, 'error'
+    
+    def parse_price(self, source, content):
+        """Pull the price out of a fetched store page and return a (price, status) tuple."""
+        price_text = self.extractor.extract(content, source['price_selector'])
+        
+        if not price_text:
+            if looks_blocked(content):
+                logger.warning("%s answered with a CAPTCHA or bot check", source['name'])
+                return None, 'blocked'
+            logger.info("No price element found for %s", source['name'])
+            return None, 'no_price'
+        
+        price = self.extract_price(price_text)
+        
+        if price:
+            logger.debug("Found price from %s: $%s", source['name'], price)
+            return price, 'ok'
+        else:
+            logger.info("Could not extract price from %s", source['name'])
+            return None, 'no_price'
+    
+    def _timed_scrape(self, source, product_name, timeout):
+        """Run a (cached) scrape and report its latency alongside the result."""
+        started = time.monotonic()
+        price, status = self._cached_scrape(source, product_name, timeout)
+        latency_ms = round((time.monotonic() - started) * 1000, 1)
+        return price, status, latency_ms
+    
+    def get_prices_from_all_stores(self, product_name, deadline=None, stores=None):
+        """
+        Scrape every store in sources in parallel under one overall deadline.
+        Returns one entry per store with its price, latency and status. Stores that
+        have not answered when the deadline expires are reported as 'timeout' and
+        abandoned; their worker finishes in the background within the scrape timeout.
+        """
+        deadline = deadline or self.deadline
+        sources = self.sources
+        if stores:
+            wanted = {store.lower() for store in stores}
+            sources = [s for s in self.sources if s['name'].lower() in wanted]
+        
+        # No single request may outlive the deadline, so abandoned workers free up quickly
+        timeout = min(self.timeout, deadline)
+        futures = {
+            self.executor.submit(self._timed_scrape, source, product_name, timeout): source
+            for source in sources
+        }
+        done, _ = concurrent.futures.wait(futures, timeout=deadline)
+        
+        results = []
+        for future, source in futures.items():
+            if future in done:
+                price, status, latency_ms = future.result()
+                results.append({
+                    'store': source['name'],
+                    'price': round(price, 2) if price else None,
+                    'latency_ms': latency_ms,
+                    'status': status
+                })
+            else:
+                # Drop it if it never started; otherwise let it finish unobserved
+                future.cancel()
+                results.append({
+                    'store': source['name'],
+                    'price': None,
+                    'latency_ms': None,
+                    'status': 'timeout'
+                })
+        
+        answered = sum(1 for r in results if r['price'])
+        logger.info("Multi-store lookup for %s: %d/%d stores answered", product_name, answered, len(results))
+        return results
+    
+    def _store_slot(self, store_name):
+        slot = self._store_slots.get(store_name)
+        if slot is None:
+            with self._executor_lock:
+                slot = self._store_slots.setdefault(store_name, threading.BoundedSemaphore(self.store_concurrency))
+        return slot
+    
+    def _limited_scrape(self, source, product_name, timeout):
+        """_timed_scrape, but never more than store_concurrency at once against the same store."""
+        with self._store_slot(source['name']):
+            return self._timed_scrape(source, product_name, timeout)
+    
+    def get_many_product_prices(self, product_names, store=None, deadline=None, use_fallback=True):
+        """
+        Scrape prices for many products concurrently from one store (Amazon by default).
+        Returns a dict mapping each product name to its price, store, status and latency.
+        Lookups still pending at the deadline are reported as 'timeout'; failed lookups
+        get a fallback price (status 'fallback') when use_fallback is set.
+        """
+        source = self.find_source(store) if store else self.sources[0]
+        if source is None:
+            raise ValueError(f"Store {store} not found in sources")
+        
+        deadline = deadline or self.deadline
+        timeout = min(self.timeout, deadline)
+        futures = {
+            self.executor.submit(self._limited_scrape, source, name, timeout): name
+            for name in set(product_names)
+        }
+        done, _ = concurrent.futures.wait(futures, timeout=deadline)
+        
+        results = {}
+        for future, name in futures.items():
+            if future in done:
+                price, status, latency_ms = future.result()
+            else:
+                future.cancel()
+                price, status, latency_ms = None, 'timeout', None
             
             if price:
-                print(f"Found price from {source['name']}: ${price}")
-                return price
-            else:
-                print(f"Could not extract price from {source['name']}")
-                return None
-                
-        except Exception as e:
-            print(f"Error scraping {source['name']}: {str(e)}")
-            return None
+                price = round(price, 2)
+            results[name] = {'price': price, 'store': source['name'], 'status': status, 'latency_ms': latency_ms}
+        
+        if use_fallback:
+            self._apply_fallbacks(results)
+        answered = sum(1 for r in results.values() if r['status'] in ('ok', 'cached'))
+        logger.info("Batch lookup on %s: %d/%d products scraped", source['name'], answered, len(results))
+        return results
+    
+    def _apply_fallbacks(self, results):
+        """Give every batch result without a price a fallback price (status 'fallback')."""
+        missing = [name for name, result in results.items() if not result['price']]
+        for name, price in self.generate_fallback_prices(missing).items():
+            results[name].update(price=price, status='fallback')
+    
+    def compare_prices(self, product_name, deadline=None, stores=None):
+        """
+        Query all stores at once and pick the lowest price found.
+        Falls back to deterministic price generation if no store answered.
+        """
+        results = self.get_prices_from_all_stores(product_name, deadline, stores)
+        prices = [r for r in results if r['price']]
+        if prices:
+            best = min(prices, key=lambda r: r['price'])
+            return {'price': best['price'], 'store': best['store'], 'stores': results}
+        
+        logger.info("No store answered for %s, using fallback price generation", product_name)
+        return {'price': self.generate_fallback_price(product_name), 'store': None, 'stores': results}
     
     def get_product_price(self, product_name, store=None):
         """
@@ -99,102 +398,35 @@ class PriceService:
         """
         if store:
             # Find the specified store in sources
-            source = next((s for s in self.sources if s['name'].lower() == store.lower()), None)
+            source = self.find_source(store)
             if source:
-                print(f"Scraping price from {store} for: {product_name}")
+                logger.debug("Scraping price from %s for: %s", store, product_name)
                 price = self.scrape_price(source, product_name)
                 if price:
-                    print(f"Price from {store}: ${price:.2f}")
+                    logger.debug("Price from %s: $%.2f", store, price)
                     return round(price, 2)
             else:
-                print(f"Store {store} not found in sources")
+                logger.warning("Store %s not found in sources", store)
         else:
             # Default to Amazon if no store specified
-            print(f"Scraping price from Amazon for: {product_name}")
+            logger.debug("Scraping price from Amazon for: %s", product_name)
             price = self.scrape_price(self.sources[0], product_name)
             if price:
-                print(f"Price from Amazon: ${price:.2f}")
+                logger.debug("Price from Amazon: $%.2f", price)
                 return round(price, 2)
         
         # If scraping failed, fall back to deterministic price generation
-        print(f"{store or 'Amazon'} scraping failed, using fallback price generation")
+        logger.info("%s scraping failed, using fallback price generation", store or 'Amazon')
         return self.generate_fallback_price(product_name)
     
     def generate_fallback_price(self, product_name):
         """Generate a consistent price for a product when scraping fails."""
-        # Convert product name to lowercase for matching
-        product_name_lower = product_name.lower()
-        
-        # Special pricing for iPhone models
-        if 'iphone' in product_name_lower:
-            # Base iPhone price
-            base_price = 799.99
-            
-            # Determine price based on iPhone model
-            if '15 pro max' in product_name_lower:
-                base_price = 1199.99
-            elif '15 pro' in product_name_lower:
-                base_price = 999.99
-            elif '15 plus' in product_name_lower:
-                base_price = 899.99
-            elif '15' in product_name_lower:
-                base_price = 799.99
-            elif '14 pro max' in product_name_lower:
-                base_price = 1099.99
-            elif '14 pro' in product_name_lower:
-                base_price = 899.99
-            elif '14 plus' in product_name_lower:
-                base_price = 799.99
-            elif '14' in product_name_lower:
-                base_price = 699.99
-            elif '13' in product_name_lower:
-                base_price = 599.99
-            elif '12' in product_name_lower:
-                base_price = 499.99
-            
-            # Storage size affects price
-            if '1tb' in product_name_lower or '1 tb' in product_name_lower:
-                base_price += 400
-            elif '512gb' in product_name_lower or '512 gb' in product_name_lower:
-                base_price += 200
-            elif '256gb' in product_name_lower or '256 gb' in product_name_lower:
-                base_price += 100
-            
-            # Add small variation for "realism"
-            variation = random.uniform(-20, 20)
-            return round(base_price + variation, 2)
-        
-        # Find base price for other products by checking keyword matches
-        base_price = None
-        for keyword, price in self.product_base_prices.items():
-            if keyword in product_name_lower:
-                base_price = price
-                break
-        
-        if base_price is None:
-            # If no keyword matches, generate a consistent price based on product name hash
-            hash_value = int(hashlib.md5(product_name_lower.encode()).hexdigest(), 16)
-            base_price = 100 + (hash_value % 900)  # Price between $100 and $999
-        
-        # Add some small random variation (+/- 5%)
-        variation = random.uniform(-0.05, 0.05) * base_price
-        
-        # Determine price model variant based on product name
-        if "pro" in product_name_lower:
-            base_price *= 1.5  # Pro models are 50% more expensive
-        elif "max" in product_name_lower:
-            base_price *= 1.8  # Max models are 80% more expensive
-        elif "plus" in product_name_lower or "+" in product_name_lower:
-            base_price *= 1.3  # Plus models are 30% more expensive
-        
-        # Add generation/version number price increases
-        for i in range(1, 20):
-            if str(i) in product_name:
-                # Newer generations are more expensive
-                base_price *= (1 + (i * 0.05))
-                break
-        
-        return round(base_price + variation, 2)
+        return self.pricing.price(product_name)
+    
+    def generate_fallback_prices(self, product_names):
+        """generate_fallback_price for many products at once, as a dict keyed by name."""
+        product_names = list(product_names)
+        return dict(zip(product_names, self.pricing.price_many(product_names)))
     
     def search_product_amazon(self, product_name):
         """
@@ -206,5 +438,5 @@ class PriceService:
             source = self.sources[0]  # Amazon is the first in our sources list
             return self.scrape_price(source, product_name) or self.generate_fallback_price(product_name)
         except Exception as e:
-            print(f"Error fetching Amazon price: {e}")
+            logger.warning("Error fetching Amazon price: %s", e)
             return self.generate_fallback_price(product_name) 
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""Fallback pricing rules, flattened once into priority-ordered pattern lists.
+
+Each table is a list of (patterns, value) rules in priority order: the first
+rule whose pattern appears anywhere in the lowercased product name wins, as in
+an if/elif chain of `in` checks. Tables are flattened to one (pattern, value)
+list with the patterns that can never decide the result dropped, and quotes
+are memoized per name, so a product that keeps falling back is priced without
+matching it again.
+"""
+import hashlib
+import random
+from functools import lru_cache
+
+IPHONE = 'iphone'
+IPHONE_DEFAULT_PRICE = 799.99
+
+# iPhone model -> base price
+IPHONE_MODELS = [
+    ('15 pro max', 1199.99),
+    ('15 pro', 999.99),
+    ('15 plus', 899.99),
+    ('15', 799.99),
+    ('14 pro max', 1099.99),
+    ('14 pro', 899.99),
+    ('14 plus', 799.99),
+    ('14', 699.99),
+    ('13', 599.99),
+    ('12', 499.99),
+]
+
+# iPhone storage size -> price added
+IPHONE_STORAGE = [
+    (('1tb', '1 tb'), 400),
+    (('512gb', '512 gb'), 200),
+    (('256gb', '256 gb'), 100),
+]
+
+# Model variant -> multiplier on the base price
+VARIANT_MULTIPLIERS = [
+    ('pro', 1.5),
+    ('max', 1.8),
+    (('plus', '+'), 1.3),
+]
+
+# Generation number -> multiplier; newer generations are more expensive
+GENERATION_MULTIPLIERS = [(str(i), 1 + (i * 0.05)) for i in range(1, 20)]
+
+
+class RuleTable:
+    """Priority-ordered substring rules, checked with plain `in` in priority order."""
+
+    def __init__(self, rules):
+        priority = {}
+        values = []
+        for rank, (patterns, value) in enumerate(rules):
+            for pattern in ((patterns,) if isinstance(patterns, str) else patterns):
+                priority.setdefault(pattern, rank)
+            values.append(value)
+
+        # A pattern containing a better-ranked one can never decide the result ("10".."19" all contain "1")
+        self.patterns = [
+            (pattern, values[rank]) for pattern, rank in sorted(priority.items(), key=lambda item: item[1])
+            if not any(other in pattern and priority[other] < rank for other in priority if other != pattern)
+        ]
+
+    def match(self, text, default=None):
+        """Value of the highest-priority rule found in text, or default."""
+        for pattern, value in self.patterns:
+            if pattern in text:
+                return value
+        return default
+
+
+class PricingRules:
+    """generate_fallback_price's rules: keyword base prices, iPhone models and storage, variants, generations."""
+
+    def __init__(self, base_prices, cache_size=4096):
+        self.keywords = RuleTable(list(base_prices.items()))
+        self.iphone_models = RuleTable(IPHONE_MODELS)
+        self.iphone_storage = RuleTable(IPHONE_STORAGE)
+        self.variants = RuleTable(VARIANT_MULTIPLIERS)
+        self.generations = RuleTable(GENERATION_MULTIPLIERS)
+        # Everything but the random variation depends only on the name
+        self.quote = lru_cache(maxsize=cache_size)(self._quote)
+
+    def _quote(self, product_name):
+        """(price, low, high, scale) for a name; the final price is price + uniform(low, high) * scale."""
+        name = product_name.lower()
+
+        if IPHONE in name:
+            base_price = self.iphone_models.match(name, IPHONE_DEFAULT_PRICE)
+            base_price += self.iphone_storage.match(name, 0)
+            return base_price, -20, 20, 1
+
+        base_price = self.keywords.match(name)
+        if base_price is None:
+            # If no keyword matches, generate a consistent price based on product name hash
+            hash_value = int(hashlib.md5(name.encode()).hexdigest(), 16)
+            base_price = 100 + (hash_value % 900)  # Price between $100 and $999
+
+        # The +/- 5% variation is taken on the keyword price, before multipliers
+        scale = base_price
+        multiplier = self.variants.match(name)
+        if multiplier is not None:
+            base_price *= multiplier
+        multiplier = self.generations.match(name)
+        if multiplier is not None:
+            base_price *= multiplier
+        return base_price, -0.05, 0.05, scale
+
+    def price(self, product_name, rng=random):
+        """A consistent price for a product with a small random variation."""
+        base_price, low, high, scale = self.quote(product_name)
+        return round(base_price + rng.uniform(low, high) * scale, 2)
+
+    def price_many(self, product_names, rng=random):
+        """price() for many names at once, in order; each distinct name is matched once."""
+        quotes = {name: self.quote(name) for name in dict.fromkeys(product_names)}
+        prices = []
+        for name in product_names:
+            base_price, low, high, scale = quotes[name]
+            prices.append(round(base_price + rng.uniform(low, high) * scale, 2))
+        return prices
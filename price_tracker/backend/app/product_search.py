@@ -0,0 +1,117 @@
+"""Ranked product-name search backed by a real index instead of ILIKE '%term%' scans.
+
+- SQLite: an FTS5 table over product.name (unicode61 tokenizer: case and accent
+  insensitive, punctuation ignored), kept in sync by triggers on product and
+  ranked by bm25.
+- Postgres: a pg_trgm GIN index on lower(name), ranked by trigram similarity.
+- Anything else (or a database not yet migrated): per-word ILIKE, shortest names first.
+
+Modes: 'prefix' matches products containing every word of the query, as a word
+prefix on SQLite ("iph 15" finds "iPhone 15 Pro") and anywhere in the name on
+Postgres; 'fuzzy' also accepts partial matches (SQLite: products with all the
+words first, then ones with some of them; Postgres: trigram similarity, so typos
+match too).
+"""
+import re
+import time
+from sqlalchemy import func, or_, and_, text
+from app import db
+from app.models import Product
+
+SEARCH_MODES = ('prefix', 'fuzzy')
+
+# Partial (any-word) matches ranked per fuzzy search on SQLite, after the all-words matches
+FUZZY_CANDIDATES = 2000
+
+# Database URLs whose search index exists (it is never dropped while the app runs), and
+# when a missing index was last looked for: a process started before `flask db upgrade`
+# picks the index up within INDEX_RECHECK_SECONDS instead of staying on ILIKE until restart
+_index_ready = set()
+_index_checked_at = {}
+INDEX_RECHECK_SECONDS = 60
+
+# How to tell that migrations/create_all have set the index up
+INDEX_CHECKS = {
+    'sqlite': "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'",
+    'postgresql': "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'",
+}
+
+
+def query_words(term):
+    """Lowercased words of a search term; punctuation and underscores separate words."""
+    return re.findall(r'[^\W_]+', (term or '').lower())
+
+
+def index_ready():
+    """Whether this database has its search index (FTS5 table or pg_trgm)."""
+    url = str(db.engine.url)
+    if url in _index_ready:
+        return True
+    check = INDEX_CHECKS.get(db.engine.dialect.name)
+    if check is None:
+        return False
+    now = time.monotonic()
+    if now - _index_checked_at.get(url, float('-inf')) < INDEX_RECHECK_SECONDS:
+        return False
+    _index_checked_at[url] = now
+    if db.session.execute(text(check)).first() is None:
+        return False
+    _index_ready.add(url)
+    return True
+
+
+def _fts_query(match, limit, exclude=(), candidates=None):
+    # Ranking scores every matching row; with candidates only the first that many
+    # matches are scored, which keeps broad partial matches cheap
+    cap = f"LIMIT {int(candidates)}" if candidates else ""
+    exclusion = f"WHERE product.id NOT IN ({', '.join(str(int(i)) for i in exclude)}) " if exclude else ""
+    statement = text(
+        "SELECT product.* FROM ("
+        f"SELECT rowid AS id, bm25(product_fts) AS score FROM product_fts WHERE product_fts MATCH :match {cap}"
+        f") AS hit JOIN product ON product.id = hit.id {exclusion}ORDER BY hit.score, product.id LIMIT :limit"
+    )
+    return Product.query.from_statement(statement).params(match=match, limit=limit).all()
+
+
+def _search_fts(words, limit, mode):
+    # Each word is a quoted prefix query, so FTS5 syntax in user input is never interpreted
+    terms = [f'"{word}"*' for word in words]
+    results = _fts_query(' AND '.join(terms), limit)
+    if mode == 'fuzzy' and len(results) < limit and len(terms) > 1:
+        # Top up with products matching only some of the words
+        results += _fts_query(' OR '.join(terms), limit - len(results),
+                              exclude=[product.id for product in results], candidates=FUZZY_CANDIDATES)
+    return results
+
+
+def _search_trigram(words, limit, mode):
+    name = func.lower(Product.name)
+    term = ' '.join(words)
+    if mode == 'fuzzy':
+        condition = or_(name.op('%')(term), *[name.contains(word, autoescape=True) for word in words])
+    else:
+        condition = and_(*[name.contains(word, autoescape=True) for word in words])
+    return (Product.query.filter(condition)
+            .order_by(func.similarity(name, term).desc(), Product.id)
+            .limit(limit).all())
+
+
+def _search_like(words, limit, mode):
+    conditions = [Product.name.ilike(f"%{word}%") for word in words]
+    condition = or_(*conditions) if mode == 'fuzzy' else and_(*conditions)
+    return Product.query.filter(condition).order_by(func.length(Product.name), Product.id).limit(limit).all()
+
+
+def search_products(term, limit=20, mode='prefix'):
+    """Products whose names match term, best match first."""
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(SEARCH_MODES)}")
+    words = query_words(term)
+    if not words:
+        return []
+
+    if not index_ready():
+        return _search_like(words, limit, mode)
+    if db.engine.dialect.name == 'sqlite':
+        return _search_fts(words, limit, mode)
+    return _search_trigram(words, limit, mode)
@@ -0,0 +1,169 @@
+from app import db
+from app.history import record_price_updates
+from app.models import Product, PriceRollup, SearchHistory
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func
+import click
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshWorker:
+    """Keeps tracked product prices fresh outside the request path.
+
+    Each tick picks the products that are due, recently searched ones first
+    and on a shorter interval, scrapes them concurrently through PriceService
+    (bounded per store), and writes all resulting prices with one commit.
+    Every attempt is recorded on the product, so one whose scrapes keep
+    failing backs off instead of coming due again on every tick.
+    """
+
+    def __init__(self, price_service, config):
+        self.price_service = price_service
+        self.interval = config['REFRESH_INTERVAL_SECONDS']
+        self.hot_interval = config['REFRESH_HOT_INTERVAL_SECONDS']
+        self.hot_window = config['REFRESH_HOT_WINDOW_SECONDS']
+        self.jitter = config['REFRESH_WORKER_JITTER']
+        self.batch_size = config['REFRESH_BATCH_SIZE']
+        self.deadline = config['REFRESH_BATCH_DEADLINE_SECONDS']
+        self.store = config['REFRESH_WORKER_STORE']
+        self.use_fallback = config['REFRESH_WORKER_USE_FALLBACK']
+        self.backoff_max = config['REFRESH_FAILURE_BACKOFF_MAX_SECONDS']
+
+    def due_products(self, now=None):
+        """Products whose price is stale, ordered by refresh priority."""
+        now = now or datetime.utcnow()
+
+        last_searched = db.session.query(
+            SearchHistory.product_id,
+            func.max(SearchHistory.timestamp).label('at')
+        ).group_by(SearchHistory.product_id).subquery()
+        # The monthly rollups carry each product's latest price timestamp without scanning raw history
+        last_refreshed = db.session.query(
+            PriceRollup.product_id,
+            func.max(PriceRollup.last_timestamp).label('at')
+        ).filter(PriceRollup.granularity == 'month').group_by(PriceRollup.product_id).subquery()
+
+        rows = db.session.query(
+            Product.id, Product.name, Product.refresh_attempted_at, Product.refresh_failures,
+            last_searched.c.at, last_refreshed.c.at
+        ).outerjoin(
+            last_searched, last_searched.c.product_id == Product.id
+        ).outerjoin(
+            last_refreshed, last_refreshed.c.product_id == Product.id
+        ).all()
+
+        # Spread refreshes out instead of letting products come due in lockstep
+        stretch = 1.0 - random.uniform(0, self.jitter)
+        hot_since = now - timedelta(seconds=self.hot_window)
+
+        due = []
+        for product_id, name, attempted_at, failures, searched_at, refreshed_at in rows:
+            hot = searched_at is not None and searched_at >= hot_since
+            interval = (self.hot_interval if hot else self.interval) * stretch
+            if failures:
+                # Double the wait after each consecutive failed scrape, up to the cap
+                interval = min(interval * 2 ** min(failures, 32), max(interval, self.backoff_max))
+            # A failed attempt leaves no price, so it counts as the last refresh too
+            last = max(filter(None, (attempted_at, refreshed_at)), default=None)
+            if last is None or last <= now - timedelta(seconds=interval):
+                due.append((product_id, name, hot, searched_at, last))
+
+        # Recently searched first (most recent search leading), then the longest unattempted
+        due.sort(key=lambda d: (
+            not d[2],
+            -d[3].timestamp() if d[3] else 0.0,
+            d[4] or datetime.min
+        ))
+        return [(product_id, name) for product_id, name, _, _, _ in due[:self.batch_size]]
+
+    def run_once(self):
+        """Refresh one batch of due products. Returns the number of prices written."""
+        started = time.monotonic()
+        products = self.due_products()
+        # Plain (id, name) pairs: give the connection back rather than sit idle in a
+        # transaction (and, on SQLite, hold a read snapshot) for the whole scrape
+        db.session.close()
+        if not products:
+            return 0
+
+        results = self.price_service.get_many_product_prices(
+            [name for _, name in products],
+            store=self.store,
+            deadline=self.deadline,
+            use_fallback=self.use_fallback
+        )
+        prices = {
+            product_id: results[name]['price']
+            for product_id, name in products
+            if results[name]['price'] is not None
+        }
+        failed = [product_id for product_id, _ in products if product_id not in prices]
+
+        try:
+            written = record_price_updates(prices)
+            self.record_attempts(prices, failed)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error writing refreshed prices: %s", e)
+            return 0
+        finally:
+            db.session.remove()
+
+        elapsed = time.monotonic() - started
+        logger.info("Refreshed %d/%d due products in %.1fs", written, len(products), elapsed)
+        return written
+
+    def record_attempts(self, refreshed_ids, failed_ids, now=None):
+        """Stamp this batch's attempt on each product: reset the failure count or add one."""
+        now = now or datetime.utcnow()
+        if refreshed_ids:
+            Product.query.filter(Product.id.in_(list(refreshed_ids))).update(
+                {'refresh_attempted_at': now, 'refresh_failures': 0}, synchronize_session=False)
+        if failed_ids:
+            Product.query.filter(Product.id.in_(failed_ids)).update(
+                {'refresh_attempted_at': now, 'refresh_failures': Product.refresh_failures + 1},
+                synchronize_session=False)
+
+    def run_forever(self, app, tick_seconds):
+        """Run a batch every tick (with jitter) until interrupted."""
+        from apscheduler.schedulers.blocking import BlockingScheduler
+
+        def tick():
+            with app.app_context():
+                self.run_once()
+
+        scheduler = BlockingScheduler()
+        scheduler.add_job(
+            tick, 'interval',
+            seconds=tick_seconds,
+            jitter=max(1, int(tick_seconds * self.jitter)),
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True
+        )
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+
+
+refresh_worker_cli = AppGroup('refresh-worker', help='Background price refresh for tracked products.')
+
+@refresh_worker_cli.command('run')
+@click.option('--once', is_flag=True, help='Refresh a single batch of due products and exit.')
+def run_command(once):
+    """Refresh tracked products' prices in this process, separate from the web workers."""
+    from app.routes import price_service
+
+    worker = RefreshWorker(price_service, current_app.config)
+    if once:
+        worker.run_once()
+        return
+    worker.run_forever(current_app._get_current_object(), current_app.config['REFRESH_WORKER_TICK_SECONDS'])
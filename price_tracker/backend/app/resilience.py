@@ -0,0 +1,153 @@
+import threading
+import time
+
+# Scrape statuses that mean the store itself is failing or pushing back, as opposed to
+# answering normally without a price ('no_price', 'http_404')
+FAILURE_STATUSES = ('timeout', 'error', 'blocked', 'http_403', 'http_429')
+
+# Page markers of CAPTCHA / bot-check interstitials, checked only on pages without a price
+BLOCK_MARKERS = (
+    b'validatecaptcha', b'robot check', b'px-captcha', b'g-recaptcha', b'h-captcha',
+    b'are you a human', b'unusual traffic', b'cf-chl', b'access denied'
+)
+BLOCK_SCAN_BYTES = 64 * 1024
+
+
+def is_store_failure(status):
+    return status in FAILURE_STATUSES or status.startswith('http_5')
+
+
+def looks_blocked(content):
+    """True if a fetched page looks like a CAPTCHA or bot-check page rather than search results."""
+    head = content[:BLOCK_SCAN_BYTES].lower()
+    return any(marker in head for marker in BLOCK_MARKERS)
+
+
+class TokenBucket:
+    """Token bucket: rate tokens per second, up to burst saved up. rate=0 disables limiting."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """Take a token and return how long to wait before using it.
+
+        Returns None, taking nothing, if the token would not be available within
+        max_wait seconds. Callers sleep (or await) the returned delay themselves.
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            # Tokens may go negative: callers already waiting are queued ahead of this one
+            self._tokens -= 1
+            return wait
+
+
+class CircuitBreaker:
+    """Stops calls to a store after failure_threshold consecutive failures.
+
+    While open every call is refused at once. After reset_timeout seconds one call
+    is let through as a probe (half-open): success closes the breaker, failure
+    opens it again for another reset_timeout. A probe that hasn't reported back
+    within reset_timeout is taken as lost and another one is allowed, so a caller
+    that never records its outcome can't keep the store shut.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.trips = 0
+        self._probing = False
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go ahead; in half-open state only one probe at a time."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self._probing and now - self._probe_started >= self.reset_timeout:
+                self._probing = False
+            if self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self._probing):
+                self._probing = self.state == self.HALF_OPEN
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """Give back a probe that was allowed but never made."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # Late failures from calls made before the breaker opened don't extend the open window
+            if self.state != self.OPEN and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trips += 1
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'trips': self.trips,
+                'rejected': self.rejected
+            }
+
+
+class StoreGuards:
+    """A rate limiter and circuit breaker per store, created on first use."""
+
+    def __init__(self, rate=4.0, burst=8, max_wait=2.0, failure_threshold=5, reset_timeout=30.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._guards = {}
+        self._lock = threading.Lock()
+
+    def get(self, store_name):
+        """(TokenBucket, CircuitBreaker) for store_name."""
+        guard = self._guards.get(store_name)
+        if guard is None:
+            with self._lock:
+                guard = self._guards.get(store_name)
+                if guard is None:
+                    guard = self._guards[store_name] = (
+                        TokenBucket(self.rate, self.burst),
+                        CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                    )
+        return guard
+
+    def stats(self):
+        return {store: breaker.stats() for store, (_, breaker) in list(self._guards.items())}
@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU cache of computed response payloads, keyed by tuples that start with a product id.
+
+    Entries are dropped per product when that product's prices change
+    (invalidate_product), so nothing is served from before a write.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._keys_by_product = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.max_size = app.config.get('PRICE_AVERAGE_CACHE_SIZE', self.max_size)
+
+    def get(self, key):
+        """Return the cached payload for key, or None."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, key, payload):
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            self._keys_by_product.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._forget(evicted)
+                self.evictions += 1
+
+    def _forget(self, key):
+        keys = self._keys_by_product.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_product[key[0]]
+
+    def invalidate_product(self, product_id):
+        """Drop every cached payload for a product."""
+        with self._lock:
+            for key in self._keys_by_product.pop(product_id, ()):
+                self._entries.pop(key, None)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_product.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,199 @@
+from app import db
+from app.models import Product, PriceHistory, PriceRollup
+from datetime import datetime
+from flask.cli import AppGroup
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
+import click
+
+GRANULARITIES = ('hour', 'day', 'month')
+
+# Rollup granularity read for each chart period; the year view combines daily rollups into weeks
+PERIOD_GRANULARITY = {
+    'today': 'hour',
+    'week': 'day',
+    'month': 'day',
+    'year': 'day',
+}
+
+def truncate(timestamp, granularity):
+    """Start of the hour/day/month bucket containing timestamp."""
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'month':
+        return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+def _aggregate(rows):
+    """Fold price rows into {(product_id, granularity, bucket_start): stats}."""
+    buckets = {}
+    for row in rows:
+        price, timestamp = row['price'], row['timestamp']
+        for granularity in GRANULARITIES:
+            key = (row['product_id'], granularity, truncate(timestamp, granularity))
+            stats = buckets.get(key)
+            if stats is None:
+                buckets[key] = {
+                    'count': 1, 'total': price, 'min_price': price, 'max_price': price,
+                    'last_price': price, 'last_timestamp': timestamp
+                }
+                continue
+            stats['count'] += 1
+            stats['total'] += price
+            stats['min_price'] = min(stats['min_price'], price)
+            stats['max_price'] = max(stats['max_price'], price)
+            if timestamp >= stats['last_timestamp']:
+                stats['last_price'] = price
+                stats['last_timestamp'] = timestamp
+    return buckets
+
+def record_prices(rows):
+    """Fold newly written price history rows into the rollups, in the caller's transaction.
+
+    rows are dicts with product_id, price and timestamp, as passed to insert_price_history.
+    Each bucket is upserted in one statement that adds to the stored stats in SQL, so
+    concurrent writers (web requests, the refresh worker) neither lose increments nor
+    collide creating the same new bucket.
+    """
+    buckets = _aggregate(rows)
+    if not buckets:
+        return
+
+    table = PriceRollup.__table__
+    insert = (postgresql if db.engine.dialect.name == 'postgresql' else sqlite).insert(table)
+    new = insert.excluded
+    newer = new.last_timestamp >= table.c.last_timestamp
+    upsert = insert.on_conflict_do_update(
+        index_elements=['product_id', 'granularity', 'bucket_start'],
+        set_={
+            'count': table.c.count + new.count,
+            'total': table.c.total + new.total,
+            'min_price': case((new.min_price < table.c.min_price, new.min_price), else_=table.c.min_price),
+            'max_price': case((new.max_price > table.c.max_price, new.max_price), else_=table.c.max_price),
+            'last_price': case((newer, new.last_price), else_=table.c.last_price),
+            'last_timestamp': case((newer, new.last_timestamp), else_=table.c.last_timestamp),
+        }
+    )
+    # Sorted so concurrent batches lock the buckets they share in the same order
+    db.session.execute(upsert, [
+        dict(stats, product_id=key[0], granularity=key[1], bucket_start=key[2])
+        for key, stats in sorted(buckets.items())
+    ])
+
+def delete_rollups(product_id):
+    PriceRollup.query.filter_by(product_id=product_id).delete()
+
+def rebuild_rollups(product_id=None, batch_size=10000):
+    """Regenerate rollups from raw price history, one product at a time. Returns rows written."""
+    if product_id is None:
+        product_ids = [row.id for row in db.session.query(Product.id).order_by(Product.id)]
+    else:
+        product_ids = [product_id]
+
+    written = 0
+    for pid in product_ids:
+        delete_rollups(pid)
+        rows = db.session.query(PriceHistory.price, PriceHistory.timestamp).filter(
+            PriceHistory.product_id == pid,
+            PriceHistory.timestamp.isnot(None)
+        ).yield_per(batch_size)
+        buckets = _aggregate({'product_id': pid, 'price': price, 'timestamp': timestamp} for price, timestamp in rows)
+        if buckets:
+            db.session.execute(PriceRollup.__table__.insert(), [
+                dict(stats, product_id=key[0], granularity=key[1], bucket_start=key[2])
+                for key, stats in buckets.items()
+            ])
+        db.session.commit()
+        written += len(buckets)
+    return written
+
+def _rollups(product_id, start_date, granularity):
+    return PriceRollup.query.filter(
+        PriceRollup.product_id == product_id,
+        PriceRollup.granularity == granularity,
+        PriceRollup.bucket_start >= truncate(start_date, granularity)
+    ).order_by(PriceRollup.bucket_start).all()
+
+def _combine_weeks(rollups):
+    """Merge daily rollups into ISO-week points for the year chart."""
+    weeks = {}
+    for rollup in rollups:
+        key = rollup.bucket_start.isocalendar()[:2]
+        week = weeks.get(key)
+        if week is None:
+            weeks[key] = week = {
+                'timestamp': rollup.bucket_start, 'count': 0, 'total': 0.0,
+                'min_price': rollup.min_price, 'max_price': rollup.max_price
+            }
+        week['count'] += rollup.count
+        week['total'] += rollup.total
+        week['min_price'] = min(week['min_price'], rollup.min_price)
+        week['max_price'] = max(week['max_price'], rollup.max_price)
+        week['last_price'] = rollup.last_price
+    return [
+        {
+            'id': None,
+            'product_id': rollups[0].product_id,
+            'price': round(week['total'] / week['count'], 2),
+            'min_price': week['min_price'],
+            'max_price': week['max_price'],
+            'count': week['count'],
+            'last_price': week['last_price'],
+            'timestamp': week['timestamp'].isoformat()
+        }
+        for week in weeks.values()
+    ]
+
+def _covers_history(product_id):
+    """Whether the product's rollups reach back to its first price.
+
+    History written before the rollup table existed is only folded in by
+    `flask rollups rebuild`; until then the rollups undercount it.
+    """
+    first_price = db.session.query(func.min(PriceHistory.timestamp)).filter(
+        PriceHistory.product_id == product_id
+    ).scalar()
+    if first_price is None:
+        return True
+    first_bucket = db.session.query(func.min(PriceRollup.bucket_start)).filter(
+        PriceRollup.product_id == product_id,
+        PriceRollup.granularity == 'hour'
+    ).scalar()
+    return first_bucket is not None and first_bucket <= truncate(first_price, 'hour')
+
+def rollup_summary(product_id, period, start_date):
+    """Aggregates and chart points for a period read from the rollups.
+
+    The window starts at the beginning of the bucket containing start_date.
+    Returns None when there are no rollups or they don't cover the product's
+    history yet, so the caller reads raw history instead.
+    """
+    rollups = _rollups(product_id, start_date, PERIOD_GRANULARITY[period])
+    if not rollups or not _covers_history(product_id):
+        return None
+
+    count = sum(r.count for r in rollups)
+    if period == 'year':
+        points = _combine_weeks(rollups)
+    else:
+        points = [r.to_dict() for r in rollups]
+    return {
+        'count': count,
+        'average': sum(r.total for r in rollups) / count,
+        'min': min(r.min_price for r in rollups),
+        'max': max(r.max_price for r in rollups),
+        'points': points
+    }
+
+rollups_cli = AppGroup('rollups', help='Maintain the pre-aggregated price rollup tables.')
+
+@rollups_cli.command('rebuild')
+@click.option('--product-id', type=int, default=None, help='Only rebuild rollups for this product.')
+def rebuild_command(product_id):
+    """Regenerate rollups from raw price history."""
+    started = datetime.utcnow()
+    written = rebuild_rollups(product_id)
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    click.echo(f"Rebuilt {written} rollup rows in {elapsed:.1f}s")
@@ -1,161 +1,163 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, g
 from app.models import Product, PriceHistory, SearchHistory
 from app.price_service import PriceService
+from app.history import (
+    PERIOD_BUCKETS, seed_price_history,
+    record_price_updates, price_stats, price_points, downsampled_price_points
+)
+from app.rollups import rollup_summary, delete_rollups
+from app.pagination import list_response, PaginationError
+from app.http_cache import conditional_product_view
+from app.response_cache import ResponseCache
+from app.write_queue import WriteQueue
+from app.product_search import search_products, SEARCH_MODES
+from app.normalization import canonical_key
+from app.metrics import registry, CONTENT_TYPE
 from app import db
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
-import traceback
-import random
+import logging
+
+logger = logging.getLogger(__name__)
 
 main_bp = Blueprint('main', __name__)
 price_service = PriceService()
+# Computed /price_average payloads per (product, period, day, options), dropped when the product's prices change
+price_average_cache = ResponseCache()
+# All request writes go through one thread that batches commits (inline when not on SQLite)
+write_queue = WriteQueue()
+
+def fetch_price(product_name, store=None):
+    """Fetch a price from one store, or from every store at once when store is 'all'.
+
+    Returns a (price, store_results) tuple; store_results is None for single-store lookups.
+    """
+    release_connection()
+    if store and store.lower() == 'all':
+        deadline = current_app.config.get('SCRAPE_DEADLINE_SECONDS')
+        comparison = price_service.compare_prices(product_name, deadline=deadline)
+        return comparison['price'], comparison['stores']
+    return price_service.get_product_price(product_name, store), None
 
-# Helper to generate more realistic historical prices using a simple
-# depreciation-style model (going back in time -> price tends to be higher).
-# monthly_rate is the percent change per month when going backwards in time.
-def price_with_time_factor(current_price: float, days_ago: float, monthly_rate: float = 0.02, noise_pct: float = 0.02,
-                           min_floor_pct: float = 0.6, max_ceiling_pct: float = 2.0) -> float:
-    """Compute a plausible past price from current_price.
+def release_connection():
+    """Return this request's database connection to the pool before a slow scrape.
 
-    Args:
-        current_price: latest known price (today).
-        days_ago: number of days in the past for the target timestamp.
-        monthly_rate: approx price increase per past month (2% default).
-        noise_pct: random noise percentage around the computed value.
-        min_floor_pct: lower clamp relative to current_price.
-        max_ceiling_pct: upper clamp relative to current_price.
+    Nothing is read while scraping, so holding it (idle in a transaction on
+    Postgres) only starves other requests. Loaded objects stay readable.
     """
-    months_ago = max(0.0, days_ago / 30.0)
-    # Going back in time, prices tend to be higher (reverse of depreciation)
-    base = current_price * (1.0 + monthly_rate * months_ago)
-    # Add mild noise
-    variation = random.uniform(-noise_pct, noise_pct) * base
-    value = base + variation
-    # Clamp to avoid unrealistic extremes
-    value = max(min_floor_pct * current_price, min(max_ceiling_pct * current_price, value))
-    return round(value, 2)
+    db.session.close()
+
+def record_search(product_id):
+    """Write job: log a search for a product."""
+    db.session.add(SearchHistory(product_id=product_id))
+
+def create_product(name, price):
+    """Write job: a new product with its seeded history and first search, returned as a dict."""
+    product = Product(name=name, current_price=price)
+    db.session.add(product)
+    db.session.flush()
+    seed_price_history(product.id, price)
+    db.session.add(SearchHistory(product_id=product.id))
+    return product.to_dict()
+
+def remove_product(product_id):
+    """Write job: delete a product with its price history, search history and rollups."""
+    PriceHistory.query.filter_by(product_id=product_id).delete()
+    SearchHistory.query.filter_by(product_id=product_id).delete()
+    delete_rollups(product_id)
+    Product.query.filter_by(id=product_id).delete()
+
+def remove_search_history(history_id):
+    """Write job: delete one search history entry."""
+    SearchHistory.query.filter_by(id=history_id).delete()
+
+def is_truthy(value):
+    """Interpret a query-string flag such as ?downsample=true."""
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
 
 @main_bp.route('/api/products', methods=['GET'])
 def get_products():
-    products = Product.query.all()
-    return jsonify([product.to_dict() for product in products])
+    try:
+        return list_response(Product.query, [Product.id], [int],
+                             serialize=lambda p: p.to_dict(),
+                             key=lambda p: [p.id])
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 @main_bp.route('/api/products', methods=['POST'])
 def add_product():
     try:
-        print("Received request to add product")
         data = request.json
-        print(f"Request data: {data}")
-        product_name = data.get('name')
+        logger.debug("Add product request: %s", data)
+        product_name = (data.get('name') or '').strip()
         store = data.get('store')  # Get store from request
         
         if not product_name:
-            print("Product name is missing")
             return jsonify({"error": "Product name is required"}), 400
         
-        # Check if product already exists
-        existing_product = Product.query.filter_by(name=product_name).first()
-        if existing_product:
-            print(f"Found existing product: {existing_product.name}")
+        def existing(product):
+            logger.debug("Found existing product: %s", product.name)
             # Update search history
-            search_history = SearchHistory(product_id=existing_product.id)
-            db.session.add(search_history)
-            db.session.commit()
-            
-            return jsonify(existing_product.to_dict())
+            write_queue.run(record_search, product.id)
+            return jsonify(product.to_dict())
+        
+        # Check if product already exists under any spelling, before anything is scraped
+        existing_product = Product.query.filter_by(canonical_key=canonical_key(product_name)).first()
+        if existing_product:
+            return existing(existing_product)
         
         # Fetch product price
-        print(f"Fetching price for: {product_name}")
+        logger.debug("Fetching price for: %s", product_name)
         try:
-            price = price_service.get_product_price(product_name, store)
+            price, store_results = fetch_price(product_name, store)
             if price is None:
                 return jsonify({"error": "Could not fetch price for this product"}), 500
         except Exception as price_error:
-            print(f"Error fetching price: {str(price_error)}")
+            logger.warning("Error fetching price: %s", price_error)
             return jsonify({"error": f"Price service error: {str(price_error)}"}), 500
         
-        # Create new product
-        print(f"Creating new product with price: {price}")
-        new_product = Product(name=product_name, current_price=price)
-        db.session.add(new_product)
-        db.session.commit()
-        
-        # Generate historical price data for better visualization
-        now = datetime.utcnow()
-        
-        # Create price history entries for today (last 24 hours)
-        for hour in range(24, 0, -2):  # Every 2 hours for the past 24 hours
-            timestamp = now - timedelta(hours=hour)
-            days_ago = hour / 24.0
-            ph_price = price_with_time_factor(price, days_ago, monthly_rate=0.02, noise_pct=0.01)
-            price_history = PriceHistory(
-                product_id=new_product.id,
-                price=ph_price,
-                timestamp=timestamp
-            )
-            db.session.add(price_history)
-        
-        # Create price history entries for past week
-        for day in range(7, 0, -1):  # Each day for past week
-            timestamp = now - timedelta(days=day)
-            ph_price = price_with_time_factor(price, day, monthly_rate=0.02, noise_pct=0.015)
-            price_history = PriceHistory(
-                product_id=new_product.id,
-                price=ph_price,
-                timestamp=timestamp
-            )
-            db.session.add(price_history)
-        
-        # Create price history entries for past month
-        for day in range(30, 0, -3):  # Every 3 days for past month
-            timestamp = now - timedelta(days=day)
-            ph_price = price_with_time_factor(price, day, monthly_rate=0.02, noise_pct=0.02)
-            price_history = PriceHistory(
-                product_id=new_product.id,
-                price=ph_price,
-                timestamp=timestamp
-            )
-            db.session.add(price_history)
-        
-        # Create price history entries for past year
-        for month in range(12, 0, -1):  # Each month for past year
-            timestamp = now - timedelta(days=month * 30)
-            ph_price = price_with_time_factor(price, month * 30, monthly_rate=0.02, noise_pct=0.025)
-            price_history = PriceHistory(
-                product_id=new_product.id,
-                price=ph_price,
-                timestamp=timestamp
-            )
-            db.session.add(price_history)
-        
-        # Add current price as most recent price history
-        price_history = PriceHistory(product_id=new_product.id, price=price, timestamp=now)
-        db.session.add(price_history)
-        
-        # Add search history
-        search_history = SearchHistory(product_id=new_product.id)
-        db.session.add(search_history)
-        
-        db.session.commit()
-        print(f"Successfully added product: {product_name}")
+        # Create new product with its seeded history and search entry, committed together
+        logger.debug("Creating new product with price: %s", price)
+        try:
+            result = write_queue.run(create_product, product_name, price)
+        except IntegrityError:
+            # A concurrent request created it after our check (the canonical key is
+            # unique); end this session's transaction so its row is visible, then use it
+            db.session.rollback()
+            existing_product = Product.query.filter_by(canonical_key=canonical_key(product_name)).first()
+            if existing_product is None:
+                raise
+            return existing(existing_product)
+        price_average_cache.invalidate_product(result['id'])
+        logger.info("Added product: %s", product_name)
         
-        return jsonify(new_product.to_dict()), 201
+        if store_results is not None:
+            result['stores'] = store_results
+        return jsonify(result), 201
     except Exception as e:
-        print(f"Error adding product: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error adding product: %s", e)
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 @main_bp.route('/api/products/<int:product_id>', methods=['GET'])
+@conditional_product_view(shared=True)
 def get_product(product_id):
     product = Product.query.get_or_404(product_id)
     return jsonify(product.to_dict())
 
 @main_bp.route('/api/products/<int:product_id>/price_history', methods=['GET'])
+@conditional_product_view()
 def get_price_history(product_id):
     product = Product.query.get_or_404(product_id)
-    price_histories = PriceHistory.query.filter_by(product_id=product_id).order_by(PriceHistory.timestamp).all()
-    return jsonify([ph.to_dict() for ph in price_histories])
+    try:
+        return list_response(PriceHistory.query.filter_by(product_id=product_id),
+                             [PriceHistory.timestamp, PriceHistory.id], [datetime, int],
+                             serialize=lambda ph: ph.to_dict(),
+                             key=lambda ph: [ph.timestamp, ph.id])
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 @main_bp.route('/api/products/<int:product_id>/price_average', methods=['GET'])
+@conditional_product_view(daily=True)
 def get_price_average(product_id):
     period = request.args.get('period', 'today')
     product = Product.query.get_or_404(product_id)
@@ -177,81 +179,92 @@ def get_price_average(product_id):
     else:
         return jsonify({"error": "Invalid period specified"}), 400
 
-    price_histories = PriceHistory.query.filter(
-        PriceHistory.product_id == product_id,
-        PriceHistory.timestamp >= start_date
-    ).order_by(PriceHistory.timestamp).all()
+    want_points = is_truthy(request.args.get('points', 'true'))
+    downsample = is_truthy(request.args.get('downsample'))
+    
+    # Keyed on the UTC day so the 'today' window never outlives midnight, and on the
+    # latest history row so writes from other processes (e.g. the refresh worker) show up
+    cache_key = (product_id, period, now.date(), want_points, downsample, g.get('product_fingerprint'))
+    result = price_average_cache.get(cache_key)
+    if result is None:
+        result = compute_price_average(product, period, start_date, now, want_points, downsample)
+        price_average_cache.set(cache_key, result)
+    return jsonify(result)
+
+def compute_price_average(product, period, start_date, now, want_points, downsample):
+    """Build the /price_average payload for a product and period."""
+    product_id = product.id
     
-    if not price_histories:
+    # Bucketed or aggregate-only views read the pre-aggregated rollups when they exist
+    if downsample or not want_points:
+        summary = rollup_summary(product_id, period, start_date)
+        if summary is not None and (summary['count'] >= 5 or period == 'today'):
+            result = {
+                "product_id": product_id,
+                "product_name": product.name,
+                "period": period,
+                "average_price": summary['average'],
+                "min_price": summary['min'],
+                "max_price": summary['max'],
+                "data_points": summary['count']
+            }
+            if want_points:
+                result["bucket"] = PERIOD_BUCKETS[period]
+                result["prices"] = summary['points']
+            return result
+    
+    # Aggregates come from SQL; points are only loaded when the client wants them
+    stats = price_stats(product_id, start_date)
+    
+    if stats['count'] == 0:
         # If no price history, generate some dummy data for visualization
         return generate_dummy_price_data(product, period, now)
     
-    total_price = sum(ph.price for ph in price_histories)
-    average_price = total_price / len(price_histories)
-    
     # If we have very few data points for a period, let's add more for better visualization
-    if len(price_histories) < 5 and period != 'today':
+    if stats['count'] < 5 and period != 'today':
+        price_histories = PriceHistory.query.filter(
+            PriceHistory.product_id == product_id,
+            PriceHistory.timestamp >= start_date
+        ).order_by(PriceHistory.timestamp).all()
         return enhance_price_data(product, period, price_histories, now)
     
-    return jsonify({
+    result = {
         "product_id": product_id,
         "product_name": product.name,
         "period": period,
-        "average_price": average_price,
-        "data_points": len(price_histories),
-        "prices": [ph.to_dict() for ph in price_histories]
-    })
+        "average_price": stats['average'],
+        "min_price": stats['min'],
+        "max_price": stats['max'],
+        "data_points": stats['count']
+    }
+    
+    # ?points=false returns only the aggregates; ?downsample=true buckets the points in SQL
+    if want_points:
+        if downsample:
+            result["bucket"] = PERIOD_BUCKETS[period]
+            result["prices"] = downsampled_price_points(product_id, start_date, PERIOD_BUCKETS[period])
+        else:
+            result["prices"] = price_points(product_id, start_date)
+    
+    return result
     
 def generate_dummy_price_data(product, period, now):
     """Generate dummy price data for visualization when no real data exists"""
-    prices = []
+    from app.synthetic_history import period_series
+    
     base_price = product.current_price
     
-    if period == 'today':
-        # Generate hourly prices for today
-        for hour in range(24, 0, -2):
-            timestamp = now - timedelta(hours=hour)
-            days_ago = hour / 24.0
-            ph_price = price_with_time_factor(base_price, days_ago, monthly_rate=0.02, noise_pct=0.01)
-            prices.append({
-                "id": None,
-                "product_id": product.id,
-                "price": ph_price,
-                "timestamp": timestamp.isoformat()
-            })
-    elif period == 'week':
-        # Generate daily prices for the week
-        for day in range(7, 0, -1):
-            timestamp = now - timedelta(days=day)
-            ph_price = price_with_time_factor(base_price, day, monthly_rate=0.02, noise_pct=0.015)
-            prices.append({
-                "id": None,
-                "product_id": product.id,
-                "price": ph_price,
-                "timestamp": timestamp.isoformat()
-            })
-    elif period == 'month':
-        # Generate prices every 3 days for the month
-        for day in range(30, 0, -3):
-            timestamp = now - timedelta(days=day)
-            ph_price = price_with_time_factor(base_price, day, monthly_rate=0.02, noise_pct=0.02)
-            prices.append({
-                "id": None,
-                "product_id": product.id,
-                "price": ph_price,
-                "timestamp": timestamp.isoformat()
-            })
-    elif period == 'year':
-        # Generate monthly prices for the year
-        for month in range(12, 0, -1):
-            timestamp = now - timedelta(days=month * 30)
-            ph_price = price_with_time_factor(base_price, month * 30, monthly_rate=0.02, noise_pct=0.025)
-            prices.append({
-                "id": None,
-                "product_id": product.id,
-                "price": ph_price,
-                "timestamp": timestamp.isoformat()
-            })
+    # The whole series comes from one vectorized call, seeded by product id so it is the same on every load
+    timestamps, series = period_series(product.id, base_price, period, now)
+    prices = [
+        {
+            "id": None,
+            "product_id": product.id,
+            "price": price,
+            "timestamp": timestamp.isoformat()
+        }
+        for timestamp, price in zip(timestamps, series)
+    ]
     
     # Add the current price
     prices.append({
@@ -265,66 +278,55 @@ def generate_dummy_price_data(product, period, now):
     total_price = sum(item["price"] for item in prices)
     average_price = total_price / len(prices)
     
-    return jsonify({
+    return {
         "product_id": product.id,
         "product_name": product.name,
         "period": period,
         "average_price": average_price,
         "data_points": len(prices),
         "prices": prices
-    })
+    }
+
+# Fewest real points a period should have before generated ones are added
+SPARSE_PERIOD_TARGETS = {
+    'week': 7,
+    'month': 10,
+    'year': 12,
+}
 
 def enhance_price_data(product, period, existing_histories, now):
     """Enhance sparse price data with additional generated points for better visualization"""
+    from app.synthetic_history import PERIOD_SCHEDULES, sparse_fill_prices
+    
     # Convert existing histories to dict format
     prices = [ph.to_dict() for ph in existing_histories]
     
     # Add additional price points based on the period
     base_price = product.current_price
     
-    if period == 'week' and len(existing_histories) < 7:
-        # Ensure we have data for each day of the week
-        existing_dates = set(ph.timestamp.date() for ph in existing_histories)
-        for day in range(7, 0, -1):
-            date = (now - timedelta(days=day)).date()
-            if date not in existing_dates:
-                timestamp = datetime.combine(date, datetime.min.time())
-                variation = random.uniform(-0.07, 0.07) * base_price
-                prices.append({
-                    "id": None,
-                    "product_id": product.id,
-                    "price": round(base_price + variation, 2),
-                    "timestamp": timestamp.isoformat()
-                })
-    
-    elif period == 'month' and len(existing_histories) < 10:
-        # Add more data points for the month view
-        existing_dates = set(ph.timestamp.date() for ph in existing_histories)
-        for day in range(30, 0, -3):
-            date = (now - timedelta(days=day)).date()
-            if date not in existing_dates:
-                timestamp = datetime.combine(date, datetime.min.time())
-                variation = random.uniform(-0.1, 0.1) * base_price
-                prices.append({
-                    "id": None,
-                    "product_id": product.id,
-                    "price": round(base_price + variation, 2),
-                    "timestamp": timestamp.isoformat()
-                })
-    
-    elif period == 'year' and len(existing_histories) < 12:
-        # Add more data points for the year view
-        existing_months = set((ph.timestamp.year, ph.timestamp.month) for ph in existing_histories)
-        for month in range(12, 0, -1):
-            date = now - timedelta(days=month*30)
-            month_key = (date.year, date.month)
-            if month_key not in existing_months:
+    if period in SPARSE_PERIOD_TARGETS and len(existing_histories) < SPARSE_PERIOD_TARGETS[period]:
+        # One slot per point of the period's schedule (daily for a week, every 3 days for a month,
+        # monthly for a year); only the slots without real data get a generated price
+        days_ago = PERIOD_SCHEDULES[period][0]
+        fill = sparse_fill_prices(product.id, base_price, period, len(days_ago))
+        if period == 'year':
+            existing = set((ph.timestamp.year, ph.timestamp.month) for ph in existing_histories)
+        else:
+            existing = set(ph.timestamp.date() for ph in existing_histories)
+        
+        for days, price in zip(days_ago, fill):
+            date = now - timedelta(days=float(days))
+            if period == 'year':
+                slot = (date.year, date.month)
                 timestamp = datetime(date.year, date.month, 1)
-                variation = random.uniform(-0.15, 0.15) * base_price
+            else:
+                slot = date.date()
+                timestamp = datetime.combine(slot, datetime.min.time())
+            if slot not in existing:
                 prices.append({
                     "id": None,
                     "product_id": product.id,
-                    "price": round(base_price + variation, 2),
+                    "price": price,
                     "timestamp": timestamp.isoformat()
                 })
     
@@ -335,14 +337,14 @@ def enhance_price_data(product, period, existing_histories, now):
     total_price = sum(item["price"] for item in prices)
     average_price = total_price / len(prices)
     
-    return jsonify({
+    return {
         "product_id": product.id,
         "product_name": product.name,
         "period": period,
         "average_price": average_price,
         "data_points": len(prices),
         "prices": prices
-    })
+    }
 
 @main_bp.route('/api/products/<int:product_id>/search_history', methods=['GET'])
 def get_search_history(product_id):
@@ -352,16 +354,21 @@ def get_search_history(product_id):
 
 @main_bp.route('/api/search_history', methods=['GET'])
 def get_all_search_history():
-    search_histories = db.session.query(SearchHistory, Product).join(Product).order_by(SearchHistory.timestamp.desc()).all()
-    
-    result = []
-    for sh, product in search_histories:
+    def serialize(row):
+        sh, product = row
         search_data = sh.to_dict()
         search_data['product_name'] = product.name
         search_data['current_price'] = product.current_price
-        result.append(search_data)
-        
-    return jsonify(result)
+        return search_data
+    
+    try:
+        return list_response(db.session.query(SearchHistory, Product).join(Product),
+                             [SearchHistory.timestamp, SearchHistory.id], [datetime, int],
+                             serialize=serialize,
+                             key=lambda row: [row[0].timestamp, row[0].id],
+                             descending=True)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 @main_bp.route('/api/products/<int:product_id>/refresh', methods=['POST'])
 def refresh_product_price(product_id):
@@ -371,25 +378,87 @@ def refresh_product_price(product_id):
         
         # Fetch new price
         try:
-            price = price_service.get_product_price(product.name, store)
+            price, store_results = fetch_price(product.name, store)
             if price is None:
                 return jsonify({"error": "Could not fetch new price"}), 500
         except Exception as price_error:
-            print(f"Error fetching price: {str(price_error)}")
+            logger.warning("Error fetching price: %s", price_error)
             return jsonify({"error": f"Price service error: {str(price_error)}"}), 500
         
-        # Update product price
-        product.current_price = price
-        db.session.commit()
+        # Update product price and add the new history entry (and its rollups) in one commit
+        write_queue.run(record_price_updates, {product_id: price})
+        price_average_cache.invalidate_product(product_id)
+        
+        result = {**product.to_dict(), "current_price": price}
+        if store_results is not None:
+            result['stores'] = store_results
+        return jsonify(result)
+    except Exception as e:
+        logger.exception("Error refreshing product price: %s", e)
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+@main_bp.route('/api/products/refresh', methods=['POST'])
+def refresh_products():
+    """Refresh many products in one request: concurrent scrapes under one deadline, one commit."""
+    try:
+        data = request.json or {}
+        product_ids = data.get('product_ids')
+        store = data.get('store')
+        use_fallback = data.get('fallback', True)
+        
+        if not isinstance(product_ids, list) or not product_ids:
+            return jsonify({"error": "product_ids must be a non-empty list"}), 400
+        # bool is an int subclass, so true/false would otherwise pass as ids 1 and 0
+        if not all(isinstance(pid, int) and not isinstance(pid, bool) for pid in product_ids):
+            return jsonify({"error": "product_ids must be integers"}), 400
+        if not isinstance(use_fallback, bool):
+            return jsonify({"error": "fallback must be a boolean"}), 400
+        max_products = current_app.config.get('BATCH_REFRESH_MAX_PRODUCTS', 100)
+        if len(product_ids) > max_products:
+            return jsonify({"error": f"At most {max_products} products can be refreshed at once"}), 400
+        
+        products = {p.id: p for p in Product.query.filter(Product.id.in_(product_ids))}
+        release_connection()
+        
+        try:
+            lookups = price_service.get_many_product_prices(
+                [p.name for p in products.values()],
+                store=store,
+                deadline=current_app.config.get('SCRAPE_DEADLINE_SECONDS'),
+                use_fallback=use_fallback
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        results = []
+        prices = {}
+        for pid in dict.fromkeys(product_ids):
+            product = products.get(pid)
+            if product is None:
+                results.append({"product_id": pid, "error": "Product not found"})
+                continue
+            
+            lookup = lookups[product.name]
+            entry = {"product_id": pid, "name": product.name, **lookup}
+            if lookup['price'] is None:
+                entry["error"] = "Could not fetch new price"
+            else:
+                prices[pid] = lookup['price']
+            results.append(entry)
         
-        # Add new price history entry
-        price_history = PriceHistory(product_id=product_id, price=price, timestamp=datetime.utcnow())
-        db.session.add(price_history)
-        db.session.commit()
+        # All price updates and history rows land in a single transaction
+        write_queue.run(record_price_updates, prices)
+        for pid in prices:
+            price_average_cache.invalidate_product(pid)
         
-        return jsonify(product.to_dict())
+        return jsonify({
+            "updated": len(prices),
+            "failed": len(results) - len(prices),
+            "results": results
+        })
     except Exception as e:
-        print(f"Error refreshing product price: {str(e)}")
+        db.session.rollback()
+        logger.exception("Error refreshing products: %s", e)
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 @main_bp.route('/api/products/<int:product_id>', methods=['DELETE'])
@@ -397,35 +466,82 @@ def delete_product(product_id):
     try:
         product = Product.query.get_or_404(product_id)
         
-        # Delete related price history
-        PriceHistory.query.filter_by(product_id=product_id).delete()
-        
-        # Delete related search history
-        SearchHistory.query.filter_by(product_id=product_id).delete()
-        
-        # Delete the product
-        db.session.delete(product)
-        db.session.commit()
+        # Delete the product with its price history, search history and price rollups
+        write_queue.run(remove_product, product_id)
+        price_average_cache.invalidate_product(product_id)
         
         return jsonify({"message": f"Product '{product.name}' deleted successfully"}), 200
     except Exception as e:
-        print(f"Error deleting product: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error deleting product: %s", e)
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 @main_bp.route('/api/search_history/<int:history_id>', methods=['DELETE'])
 def delete_search_history(history_id):
     try:
-        search_history = SearchHistory.query.get_or_404(history_id)
-        db.session.delete(search_history)
-        db.session.commit()
+        SearchHistory.query.get_or_404(history_id)
+        write_queue.run(remove_search_history, history_id)
         
         return jsonify({"message": "Search history deleted successfully"}), 200
     except Exception as e:
-        print(f"Error deleting search history: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error deleting search history: %s", e)
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@main_bp.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        "price_average": price_average_cache.stats(),
+        "scrape": price_service.cache.stats(),
+        "scrape_inflight": price_service.inflight.stats(),
+        "stores": price_service.guards.stats(),
+        "write_queue": write_queue.stats()
+    })
+
+@registry.collector
+def cache_metrics():
+    """/metrics families for the counters behind /api/cache/stats."""
+    caches = {'price_average': price_average_cache.stats(), 'scrape': price_service.cache.stats()}
+    lookups = []
+    for cache, stats in caches.items():
+        lookups.append(({'cache': cache, 'result': 'hit'}, stats['hits']))
+        lookups.append(({'cache': cache, 'result': 'miss'}, stats['misses']))
+    lookups.append(({'cache': 'scrape', 'result': 'negative_hit'}, caches['scrape']['negative_hits']))
+    yield 'cache_lookups_total', 'counter', 'Cache lookups by cache and result.', lookups
+    yield 'cache_evictions_total', 'counter', 'Entries evicted to stay under the size limit.', [
+        ({'cache': cache}, stats['evictions']) for cache, stats in caches.items()]
+    yield 'cache_entries', 'gauge', 'Entries currently cached.', [
+        ({'cache': cache}, stats['size']) for cache, stats in caches.items()]
+    yield 'cache_hit_ratio', 'gauge', 'Hits (including negative hits) per lookup since start.', [
+        ({'cache': cache}, stats['hit_rate']) for cache, stats in caches.items()]
+    
+    inflight = price_service.inflight.stats()
+    yield 'scrape_singleflight_calls_total', 'counter', 'Cache-missing scrapes by whether they ran or joined one in flight.', [
+        ({'result': 'ran'}, inflight['calls']), ({'result': 'coalesced'}, inflight['coalesced'])]
+    yield 'scrape_singleflight_in_flight', 'gauge', 'Scrapes currently in flight.', [({}, inflight['in_flight'])]
+    
+    breakers = price_service.guards.stats()
+    yield 'scrape_breaker_state', 'gauge', 'Circuit breaker state per store (1 for the current state).', [
+        ({'store': store, 'state': state}, int(stats['state'] == state))
+        for store, stats in breakers.items() for state in ('closed', 'open', 'half_open')]
+    yield 'scrape_breaker_trips_total', 'counter', 'Times a store\'s circuit breaker opened.', [
+        ({'store': store}, stats['trips']) for store, stats in breakers.items()]
+    yield 'scrape_breaker_rejected_total', 'counter', 'Scrapes skipped because the store\'s breaker was open.', [
+        ({'store': store}, stats['rejected']) for store, stats in breakers.items()]
+    
+    queue = write_queue.stats()
+    yield 'write_queue_pending', 'gauge', 'Write jobs waiting for the writer thread.', [({}, queue['pending'])]
+    yield 'write_queue_batches_total', 'counter', 'Batches committed by the writer thread.', [({}, queue['batches'])]
+    yield 'write_queue_jobs_total', 'counter', 'Write jobs by outcome.', [
+        ({'result': 'written'}, queue['jobs_written']), ({'result': 'failed'}, queue['jobs_failed']),
+        ({'result': 'abandoned'}, queue['jobs_abandoned'])]
+
+@main_bp.route('/metrics', methods=['GET'])
+@main_bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint (also under /api, which is all that reaches the app on Vercel)."""
+    if not current_app.config.get('METRICS_ENABLED', True):
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return registry.render(), 200, {'Content-Type': CONTENT_TYPE}
+
 @main_bp.route('/api/products/by-name', methods=['GET'])
 def get_product_by_name():
     product_name = request.args.get('name')
@@ -433,9 +549,32 @@ def get_product_by_name():
     if not product_name:
         return jsonify({"error": "Product name is required"}), 400
     
-    product = Product.query.filter(Product.name.ilike(f"%{product_name}%")).first()
+    # Same canonical name first (indexed), then the best-ranked search match
+    product = Product.query.filter_by(canonical_key=canonical_key(product_name)).first()
+    if not product:
+        matches = search_products(product_name, limit=1)
+        product = matches[0] if matches else None
     
     if not product:
         return jsonify({"error": "Product not found"}), 404
     
-    return jsonify(product.to_dict()) 
\ No newline at end of file
+    return jsonify(product.to_dict())
+
+@main_bp.route('/api/products/search', methods=['GET'])
+def search_products_by_name():
+    """Ranked product-name search: ?q=<words>&limit=<1-100, default 20>&mode=prefix|fuzzy."""
+    query = request.args.get('q')
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    
+    mode = request.args.get('mode', 'prefix')
+    if mode not in SEARCH_MODES:
+        return jsonify({"error": f"mode must be one of: {', '.join(SEARCH_MODES)}"}), 400
+    
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, 100))
+    
+    return jsonify([product.to_dict() for product in search_products(query, limit=limit, mode=mode)])
@@ -0,0 +1,158 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.normalization import canonical_key
+
+logger = logging.getLogger(__name__)
+
+# Returned by ScrapeCache.get when nothing usable is cached. A cached None is a
+# negative entry (the store failed recently) and is distinct from a miss.
+MISS = object()
+
+
+class SqliteCacheBackend:
+    """Scrape results stored in a SQLite table so several workers share cache hits."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared across threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS scrape_cache ('
+                ' store TEXT NOT NULL,'
+                ' query TEXT NOT NULL,'
+                ' price REAL,'
+                ' expires_at REAL NOT NULL,'
+                ' PRIMARY KEY (store, query))'
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return (price, expires_at) for key, or None if absent or expired."""
+        row = self._connection().execute(
+            'SELECT price, expires_at FROM scrape_cache WHERE store = ? AND query = ?', key
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row
+
+    def set(self, key, price, expires_at):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO scrape_cache (store, query, price, expires_at) VALUES (?, ?, ?, ?)',
+            (key[0], key[1], price, expires_at)
+        )
+
+    def purge_expired(self):
+        self._connection().execute('DELETE FROM scrape_cache WHERE expires_at <= ?', (time.time(),))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM scrape_cache')
+
+
+class ScrapeCache:
+    """In-process TTL + LRU cache of scrape results keyed by (store, canonical product name).
+
+    Failed lookups are cached as None for negative_ttl seconds so a store that is
+    returning errors isn't hit again on every request. An optional shared backend
+    is consulted on local misses and written through on every set.
+    """
+
+    def __init__(self, ttl=900, negative_ttl=120, max_size=1024, backend=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(store, product_name):
+        return (store.lower(), canonical_key(product_name))
+
+    def get(self, store, product_name):
+        """Return the cached price (None for a cached failure) or MISS."""
+        key = self.key(store, product_name)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                price, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count_hit(price)
+                    return price
+                del self._entries[key]
+
+        if self.backend is not None:
+            try:
+                row = self.backend.get(key)
+            except sqlite3.Error as e:
+                logger.warning("Scrape cache backend error: %s", e)
+                row = None
+            if row is not None:
+                price, expires_at = row
+                with self._lock:
+                    self._store(key, price, expires_at)
+                    self._count_hit(price)
+                return price
+
+        with self._lock:
+            self.misses += 1
+        return MISS
+
+    def set(self, store, product_name, price):
+        """Cache a scrape result; None records a failed lookup."""
+        key = self.key(store, product_name)
+        expires_at = time.time() + (self.ttl if price is not None else self.negative_ttl)
+        with self._lock:
+            self._store(key, price, expires_at)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, price, expires_at)
+            except sqlite3.Error as e:
+                logger.warning("Scrape cache backend error: %s", e)
+
+    def _store(self, key, price, expires_at):
+        self._entries[key] = (price, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _count_hit(self, price):
+        if price is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0
+            }
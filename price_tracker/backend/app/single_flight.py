@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one call whose result they all share.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and get the same result (or exception). Nothing is
+    kept once the call returns; caching is up to the caller.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop.
+
+    The shared call runs as its own task, so one waiter being cancelled (e.g. at
+    its deadline) doesn't cancel it for the others; it is cancelled once every
+    waiter has gone.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn(*args, **kwargs)))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._flights)}
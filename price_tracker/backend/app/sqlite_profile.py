@@ -0,0 +1,79 @@
+from sqlalchemy import DDL, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def is_sqlite_file(uri):
+    """True for a file-backed SQLite URI (in-memory databases are left alone)."""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def configure_sqlite(app):
+    """Engine options for the production SQLite profile. Call before db.init_app.
+
+    SQLAlchemy 1.4 opens a new connection to a SQLite file for every checkout,
+    so the pragmas below would be paid on each session; keep a pool of open
+    connections instead. busy_timeout doubles as the driver's lock wait.
+    """
+    if not is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    connect_args = dict(options.get('connect_args') or {})
+    connect_args.setdefault('check_same_thread', False)
+    connect_args.setdefault('timeout', app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000.0)
+    options['connect_args'] = connect_args
+    options.setdefault('poolclass', QueuePool)
+    options.setdefault('pool_size', app.config.get('SQLITE_POOL_SIZE', 8))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def apply_sqlite_pragmas(engine, config):
+    """Set WAL mode and the tuned pragmas on every new connection to a SQLite engine.
+
+    In WAL mode readers keep reading the last committed snapshot while a write
+    is in progress, and synchronous=NORMAL only syncs at checkpoints.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = [
+        f"PRAGMA journal_mode={config.get('SQLITE_JOURNAL_MODE', 'wal')}",
+        f"PRAGMA synchronous={config.get('SQLITE_SYNCHRONOUS', 'normal')}",
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        f"PRAGMA cache_size={int(config.get('SQLITE_CACHE_SIZE', -64000))}",
+        "PRAGMA temp_store=memory",
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def sqlite_has_fts5(ddl, target, bind, **kw):
+    """DDL.execute_if callable: a SQLite database built with FTS5 (Python's bundled SQLite almost always is)."""
+    if bind.dialect.name != 'sqlite':
+        return False
+    return bool(bind.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar())
+
+
+# Product-name search index (see app/product_search.py): an external-content FTS5 table
+# storing only the index, kept in sync with product by triggers
+PRODUCT_FTS = [
+    DDL("CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5("
+        "name, content='product', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"),
+    DDL("CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON product BEGIN "
+        "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END"),
+    DDL("CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON product BEGIN "
+        "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); END"),
+    # Only renames touch the index; price updates don't
+    DDL("CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE OF name ON product BEGIN "
+        "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END"),
+]
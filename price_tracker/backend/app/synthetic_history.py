@@ -0,0 +1,108 @@
+"""Synthetic price history, generated a whole series at a time with NumPy.
+
+Past prices follow a simple depreciation-style model: going back in time the
+price tends to be higher (monthly_rate per month), with mild noise, clamped
+relative to the current price. Noise comes from a generator seeded with the
+product id, so the same product always gets the same series; chart payloads
+built from it are reproducible and can be cached.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+
+# Points generated for each chart period, as (days back for each point, noise_pct):
+# every 2 hours for the last day, daily for a week, every 3 days for a month, monthly for a year.
+PERIOD_SCHEDULES = {
+    'today': (np.arange(24, 0, -2) / 24.0, 0.01),
+    'week': (np.arange(7, 0, -1, dtype=float), 0.015),
+    'month': (np.arange(30, 0, -3, dtype=float), 0.02),
+    'year': (np.arange(12, 0, -1) * 30.0, 0.025),
+}
+
+# Noise for points added around the current price when a period has sparse real data
+SPARSE_FILL_NOISE = {
+    'week': 0.07,
+    'month': 0.1,
+    'year': 0.15,
+}
+
+MONTHLY_RATE = 0.02
+MIN_FLOOR_PCT = 0.6
+MAX_CEILING_PCT = 2.0
+
+# Separate random streams per use, so e.g. the seeded history and the chart fill don't share noise
+_STREAMS = {'seed': 0, 'today': 1, 'week': 2, 'month': 3, 'year': 4, 'fill': 5}
+
+
+def rng_for(product_id, stream):
+    """Deterministic generator for one product and use."""
+    return np.random.default_rng([int(product_id or 0), _STREAMS[stream]])
+
+
+def time_factor_prices(current_price, days_ago, rng, noise_pct=0.02, monthly_rate=MONTHLY_RATE):
+    """Plausible past prices for an array of days_ago offsets (rounded to cents).
+
+    current_price may be a scalar or a column of prices (shape (n, 1)) to
+    generate one row of the series per product.
+    """
+    current_price = np.asarray(current_price, dtype=float)
+    months_ago = np.maximum(0.0, np.asarray(days_ago, dtype=float) / 30.0)
+    # Going back in time, prices tend to be higher (reverse of depreciation)
+    base = current_price * (1.0 + monthly_rate * months_ago)
+    noise = rng.uniform(-noise_pct, noise_pct, size=base.shape)
+    value = base * (1.0 + noise)
+    # Clamp to avoid unrealistic extremes
+    value = np.clip(value, MIN_FLOOR_PCT * current_price, MAX_CEILING_PCT * current_price)
+    return np.round(value, 2)
+
+
+def period_series(product_id, current_price, period, now):
+    """(timestamps, prices) for one chart period, oldest first, not including the current price."""
+    days_ago, noise_pct = PERIOD_SCHEDULES[period]
+    prices = time_factor_prices(current_price, days_ago, rng_for(product_id, period), noise_pct)
+    timestamps = [now - timedelta(days=float(d)) for d in days_ago]
+    return timestamps, prices.tolist()
+
+
+def seed_rows(product_id, current_price, now=None):
+    """History rows seeded for a new product: every period's schedule, then the current price."""
+    now = now or datetime.utcnow()
+    days_ago = np.concatenate([offsets for offsets, _ in PERIOD_SCHEDULES.values()])
+    noise_pct = np.concatenate([np.full(len(offsets), pct) for offsets, pct in PERIOD_SCHEDULES.values()])
+    prices = time_factor_prices(current_price, days_ago, rng_for(product_id, 'seed'), noise_pct)
+
+    rows = [
+        {'product_id': product_id, 'price': price, 'timestamp': now - timedelta(days=float(d))}
+        for d, price in zip(days_ago, prices.tolist())
+    ]
+    rows.append({'product_id': product_id, 'price': current_price, 'timestamp': now})
+    return rows
+
+
+def seed_rows_many(product_ids, current_prices, now=None, seed=0):
+    """Seed history for many products in one vectorized call, e.g. for load-testing fixtures.
+
+    Noise comes from a single generator seeded with seed, so the whole batch is
+    reproducible (but a product's rows differ from seed_rows for the same id).
+    """
+    now = now or datetime.utcnow()
+    days_ago = np.concatenate([offsets for offsets, _ in PERIOD_SCHEDULES.values()])
+    noise_pct = np.concatenate([np.full(len(offsets), pct) for offsets, pct in PERIOD_SCHEDULES.values()])
+    prices = np.asarray(current_prices, dtype=float).reshape(-1, 1)
+    matrix = time_factor_prices(prices, days_ago, np.random.default_rng(seed), noise_pct).tolist()
+
+    timestamps = [now - timedelta(days=float(d)) for d in days_ago]
+    rows = []
+    for product_id, current_price, series in zip(product_ids, prices[:, 0].tolist(), matrix):
+        rows.extend(
+            {'product_id': product_id, 'price': price, 'timestamp': timestamp}
+            for timestamp, price in zip(timestamps, series)
+        )
+        rows.append({'product_id': product_id, 'price': current_price, 'timestamp': now})
+    return rows
+
+
+def sparse_fill_prices(product_id, base_price, period, count):
+    """count prices scattered around base_price to pad out a sparse chart."""
+    pct = SPARSE_FILL_NOISE[period]
+    noise = rng_for(product_id, 'fill').uniform(-pct, pct, size=count)
+    return np.round(base_price * (1.0 + noise), 2).tolist()
@@ -0,0 +1,167 @@
+from app import db
+from app.sqlite_profile import is_sqlite_file
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Serializes database writes through one thread that commits them in batches.
+
+    A job is a function that makes its changes on db.session without
+    committing. The writer thread takes whatever jobs are waiting (up to
+    batch_size, collecting for at most batch_window seconds after the first)
+    and commits them together. Writers in this process then never fight over
+    the SQLite lock, and with WAL, readers never wait on them.
+
+    Jobs run in the writer's own session, so they take ids and values, not
+    ORM objects loaded by the caller; the caller's session is closed while it
+    waits. When the queue is disabled (or the database isn't SQLite) jobs run
+    inline and are committed on the spot.
+
+    A caller that gives up after timeout seconds withdraws its job, so a
+    write reported as failed never lands later; a job the writer has already
+    started is waited for instead.
+    """
+
+    def __init__(self, batch_size=64, batch_window=0.005, timeout=30.0):
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.enabled = False
+        self._app = None
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.jobs_written = 0
+        self.jobs_failed = 0
+        self.jobs_abandoned = 0
+
+    def init_app(self, app):
+        self.stop()
+        self._app = app
+        self.batch_size = app.config.get('WRITE_QUEUE_BATCH_SIZE', self.batch_size)
+        self.batch_window = app.config.get('WRITE_QUEUE_BATCH_WINDOW_MS', self.batch_window * 1000) / 1000.0
+        self.timeout = app.config.get('WRITE_QUEUE_TIMEOUT_SECONDS', self.timeout)
+        self.enabled = (app.config.get('WRITE_QUEUE_ENABLED', True)
+                        and is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    def run(self, job, *args, **kwargs):
+        """Run job's writes and commit them. Returns job's result or raises its exception."""
+        if not self.enabled:
+            try:
+                result = job(*args, **kwargs)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            return result
+        # The writer needs a pooled connection too: give back the caller's while waiting, or
+        # enough waiting requests would hold every connection and starve it. Objects the
+        # caller already loaded stay readable (detached, not expired).
+        db.session.close()
+        future = self.submit(job, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            if future.cancel():
+                # Still queued and now never run: the caller may safely report failure or retry
+                raise
+            # Already being written; its commit (or failure) is moments away
+            return future.result()
+
+    def submit(self, job, *args, **kwargs):
+        """Queue job for the writer thread; the returned Future resolves once it is committed."""
+        self._ensure_started()
+        future = Future()
+        self._jobs.put((future, job, args, kwargs))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._writer, args=(self._app,),
+                                                name='db-writer', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Let the writer finish the queued jobs, then exit."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._jobs.put(_STOP)
+            thread.join()
+
+    def _writer(self, app):
+        with app.app_context():
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                batch = self._claim(batch)
+                if batch:
+                    self._write(batch)
+                    db.session.close()
+
+    def _next_batch(self):
+        """Block for the first job, then gather more until the batch is full or the window closes.
+
+        Returns (jobs, stopping).
+        """
+        first = self._jobs.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            try:
+                item = self._jobs.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _claim(self, batch):
+        """Drop jobs whose callers gave up waiting; the rest can no longer be withdrawn."""
+        claimed = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        self.jobs_abandoned += len(batch) - len(claimed)
+        return claimed
+
+    def _write(self, batch):
+        try:
+            results = [job(*args, **kwargs) for _, job, args, kwargs in batch]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                self._fail(batch[0][0], e)
+                return
+            # One bad job shouldn't sink the others: retry each with its own commit
+            for item in batch:
+                self._write([item])
+            return
+
+        self.batches += 1
+        self.jobs_written += len(batch)
+        for (future, _, _, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def _fail(self, future, error):
+        self.jobs_failed += 1
+        future.set_exception(error)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'pending': self._jobs.qsize(),
+            'batches': self.batches,
+            'jobs_written': self.jobs_written,
+            'jobs_failed': self.jobs_failed,
+            'jobs_abandoned': self.jobs_abandoned,
+            'average_batch_size': self.jobs_written / self.batches if self.batches else 0.0
+        }
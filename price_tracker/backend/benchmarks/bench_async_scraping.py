@@ -0,0 +1,119 @@
+"""Batch scraping throughput: thread-pool PriceService vs AsyncPriceService against a local stub store.
+
+A threaded stub server answers every store's search URL with that store's fixture
+page (see benchmarks/fixtures.py) after --latency-ms, like a remote site. Each store
+is addressed through its own loopback IP (127.0.0.N) so per-host limits apply as they
+would in production. Both services refresh the same products across all stores.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_async_scraping [--products 200] [--latency-ms 150]
+"""
+import argparse
+import contextlib
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.async_price_service import AsyncPriceService
+from app.http_pool import SessionPool
+from app.price_service import PriceService
+from app.resilience import StoreGuards
+from benchmarks.fixtures import load_fixture, store_slug, synthetic_page
+
+
+def start_stub_store(pages, latency):
+    """Serve pages[slug] for /<slug>/search after latency seconds; returns (server, port)."""
+    class StubStore(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = pages.get(self.path.split('/')[1])
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', 0), StubStore)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def point_at_stub(service, port):
+    for i, source in enumerate(service.sources):
+        source['url'] = f"http://127.0.0.{i + 1}:{port}/{store_slug(source['name'])}/search?q={{query}}"
+
+
+def run(service, products, label):
+    """Refresh products on every store at once, one caller thread per store (like concurrent batch refreshes)."""
+    stores = [source['name'] for source in service.sources]
+    results = []
+
+    def refresh(store):
+        results.append(service.get_many_product_prices(products, store=store, use_fallback=False))
+
+    started = time.perf_counter()
+    # Product output is suppressed; only the totals matter here
+    with contextlib.redirect_stdout(io.StringIO()):
+        callers = [threading.Thread(target=refresh, args=(store,)) for store in stores]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+    elapsed = time.perf_counter() - started
+    scraped = sum(1 for batch in results for r in batch.values() if r['status'] == 'ok')
+    lookups = len(products) * len(stores)
+    print(f"{label:<8} {lookups / elapsed:>8.1f} lookups/s  ({scraped}/{lookups} ok in {elapsed:.2f}s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=150)
+    parser.add_argument('--store-concurrency', type=int, default=8, help='in-flight requests per store, both backends')
+    parser.add_argument('--workers', type=int, default=8, help='thread-pool size for PriceService')
+    parser.add_argument('--max-concurrency', type=int, default=64, help='requests in flight for AsyncPriceService')
+    parser.add_argument('--synthetic', action='store_true', help='small synthetic pages instead of saved fixtures')
+    args = parser.parse_args()
+
+    threaded = PriceService(max_workers=args.workers, deadline=600, store_concurrency=args.store_concurrency)
+    threaded.http = SessionPool(headers=threaded.headers, pool_maxsize=args.store_concurrency)
+    asynchronous = AsyncPriceService(max_concurrency=args.max_concurrency, deadline=600,
+                                     store_concurrency=args.store_concurrency)
+    asynchronous.pool_maxsize = args.store_concurrency
+    # Measure the scraping engines, not the politeness limits
+    for service in (threaded, asynchronous):
+        service.guards = StoreGuards(rate=0)
+
+    pages = {
+        store_slug(source['name']): synthetic_page(source, results=10, head_kb=20) if args.synthetic else load_fixture(source)
+        for source in threaded.sources
+    }
+    server, port = start_stub_store(pages, args.latency_ms / 1000.0)
+    for service in (threaded, asynchronous):
+        point_at_stub(service, port)
+
+    # Distinct names per backend so neither is served from the other's (or its own) cache
+    before = run(threaded, [f"threads product {i}" for i in range(args.products)], 'threads')
+    after = run(asynchronous, [f"async product {i}" for i in range(args.products)], 'async')
+    print(f"speedup: {before / after:.1f}x")
+
+    asynchronous.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
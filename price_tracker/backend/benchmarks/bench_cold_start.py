@@ -0,0 +1,102 @@
+"""Cold start of the serverless entry point: import time, time to first response, eagerly imported modules.
+
+Each run is a fresh interpreter importing server/index.py under `python -X importtime`
+and answering one request, like a Vercel cold start. Exits non-zero when a run goes over
+--budget-ms or a scraping dependency is imported at startup, so it can gate CI.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_cold_start [--runs 5] [--budget-ms 1500] [--no-serverless]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'server')
+
+# Only needed once a request scrapes or generates history
+LAZY_MODULES = ('requests', 'urllib3', 'bs4', 'lxml', 'numpy', 'alembic', 'flask_migrate')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {server_dir!r})
+import index
+imported = time.perf_counter()
+response = index.app.test_client().get('/api/healthcheck')
+ready = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'ready_ms': (ready - started) * 1000,
+    'status': response.status_code,
+    'eager': [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def cold_start(serverless):
+    env = dict(os.environ)
+    env['SERVERLESS'] = 'true' if serverless else 'false'
+    env['DATABASE_URL'] = 'sqlite:///' + tempfile.mktemp(suffix='.db')
+    probe = PROBE.format(server_dir=os.path.abspath(SERVER_DIR), lazy=LAZY_MODULES)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                            env=env, capture_output=True, text=True, check=True)
+    path = env['DATABASE_URL'][len('sqlite:///'):]
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats['modules'] = parse_importtime(result.stderr)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail if the median time to first response exceeds this')
+    parser.add_argument('--top', type=int, default=12, help='slowest modules to list (by self time)')
+    parser.add_argument('--no-serverless', action='store_true', help='start like a long-running server (migrations CLI, create_all)')
+    args = parser.parse_args()
+
+    runs = [cold_start(not args.no_serverless) for _ in range(args.runs)]
+    import_ms = statistics.median(r['import_ms'] for r in runs)
+    ready_ms = statistics.median(r['ready_ms'] for r in runs)
+    eager = sorted({m for r in runs for m in r['eager']})
+
+    print(f"mode:               {'server' if args.no_serverless else 'serverless'}")
+    print(f"import (median):    {import_ms:8.1f} ms")
+    print(f"first response:     {ready_ms:8.1f} ms")
+    print(f"modules imported:   {len(runs[-1]['modules'])}")
+    print(f"eager lazy deps:    {', '.join(eager) or 'none'}")
+
+    print("\nslowest modules (self time, last run):")
+    modules = runs[-1]['modules']
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda m: -m[1][0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    failed = False
+    if not args.no_serverless and eager:
+        print(f"\nFAIL: imported at startup but only needed on first scrape: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and ready_ms > args.budget_ms:
+        print(f"\nFAIL: first response took {ready_ms:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
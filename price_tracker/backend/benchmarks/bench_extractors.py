@@ -0,0 +1,52 @@
+"""Compare price extractors on a fixture page for every store in PriceService.sources.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_extractors [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+from app.extractors import EXTRACTORS, available_extractors
+from app.price_service import PriceService
+from benchmarks.fixtures import load_fixture
+
+
+def time_extractor(extractor, content, selector, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = extractor.extract(content, selector)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    names = available_extractors()
+    extractors = {name: EXTRACTORS[name]() for name in names}
+    print(f"{'store':<12} {'page KB':>8} " + ' '.join(f"{name + ' ms':>14}" for name in names) + '  speedup')
+
+    for source in PriceService().sources:
+        content = load_fixture(source)
+        row = {}
+        for name, extractor in extractors.items():
+            row[name] = time_extractor(extractor, content, source['price_selector'], args.repeat)
+
+        baseline_ms, baseline_text = row['soup']
+        for name, (_, text) in row.items():
+            if text != baseline_text:
+                print(f"  ! {source['name']}: {name} returned {text!r}, soup returned {baseline_text!r}")
+
+        fastest = min(row, key=lambda name: row[name][0])
+        cells = ' '.join(f"{row[name][0] * 1000:>14.2f}" for name in names)
+        speedup = baseline_ms / row[fastest][0]
+        print(f"{source['name']:<12} {len(content) / 1024:>8.0f} {cells}  {speedup:.1f}x ({fastest})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Fallback price generation per call: the if/elif chains and substring loops vs the flattened, memoized rules.
+
+Names are random mixes of brands, models, storage sizes and generation numbers.
+"unique" prices every name once (no reuse of earlier matches), "repeat" prices
+a small set of names over and over, like a batch refresh during a store outage.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_fallback_pricing [--names 20000]
+"""
+import argparse
+import hashlib
+import random
+import time
+
+from app.price_service import PriceService
+from app.pricing_rules import PricingRules
+
+WORDS = ['Apple', 'iPhone', 'Samsung', 'Galaxy', 'Sony', 'PlayStation', 'Dell', 'XPS', 'MacBook', 'AirPods',
+         'Pro', 'Max', 'Plus', 'Ultra', 'Mini', 'tv', 'monitor', 'laptop', 'headphones', 'camera',
+         '12', '13', '14', '15', '16', '2024', '256GB', '512 gb', '1TB', 'Black', 'Silver', 'Wireless']
+
+
+def legacy_fallback_price(product_name, product_base_prices):
+    """generate_fallback_price as it was before the rules were moved to app/pricing_rules.py, kept here for comparison."""
+    product_name_lower = product_name.lower()
+    if 'iphone' in product_name_lower:
+        base_price = 799.99
+        if '15 pro max' in product_name_lower:
+            base_price = 1199.99
+        elif '15 pro' in product_name_lower:
+            base_price = 999.99
+        elif '15 plus' in product_name_lower:
+            base_price = 899.99
+        elif '15' in product_name_lower:
+            base_price = 799.99
+        elif '14 pro max' in product_name_lower:
+            base_price = 1099.99
+        elif '14 pro' in product_name_lower:
+            base_price = 899.99
+        elif '14 plus' in product_name_lower:
+            base_price = 799.99
+        elif '14' in product_name_lower:
+            base_price = 699.99
+        elif '13' in product_name_lower:
+            base_price = 599.99
+        elif '12' in product_name_lower:
+            base_price = 499.99
+        if '1tb' in product_name_lower or '1 tb' in product_name_lower:
+            base_price += 400
+        elif '512gb' in product_name_lower or '512 gb' in product_name_lower:
+            base_price += 200
+        elif '256gb' in product_name_lower or '256 gb' in product_name_lower:
+            base_price += 100
+        variation = random.uniform(-20, 20)
+        return round(base_price + variation, 2)
+
+    base_price = None
+    for keyword, price in product_base_prices.items():
+        if keyword in product_name_lower:
+            base_price = price
+            break
+    if base_price is None:
+        hash_value = int(hashlib.md5(product_name_lower.encode()).hexdigest(), 16)
+        base_price = 100 + (hash_value % 900)
+    variation = random.uniform(-0.05, 0.05) * base_price
+    if "pro" in product_name_lower:
+        base_price *= 1.5
+    elif "max" in product_name_lower:
+        base_price *= 1.8
+    elif "plus" in product_name_lower or "+" in product_name_lower:
+        base_price *= 1.3
+    for i in range(1, 20):
+        if str(i) in product_name:
+            base_price *= (1 + (i * 0.05))
+            break
+    return round(base_price + variation, 2)
+
+
+def per_call_us(fn, names):
+    started = time.perf_counter()
+    fn(names)
+    return (time.perf_counter() - started) / len(names) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=20000)
+    parser.add_argument('--distinct', type=int, default=200, help='distinct names in the "repeat" workload')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    names = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) for _ in range(args.names)]
+    repeated = [names[rng.randrange(args.distinct)] for _ in range(args.names)]
+    base_prices = PriceService().product_base_prices
+
+    # Same seed for both: the flattened rules must give identical prices
+    random.seed(0)
+    expected = [legacy_fallback_price(name, base_prices) for name in names]
+    random.seed(0)
+    assert PricingRules(base_prices).price_many(names) == expected, "flattened rules disagree with the legacy chain"
+
+    print(f"{'workload':<8} {'legacy us':>10} {'rules us':>10} {'batch us':>10}")
+    for label, workload in (('unique', names), ('repeat', repeated)):
+        legacy = per_call_us(lambda ns: [legacy_fallback_price(n, base_prices) for n in ns], workload)
+        rules = PricingRules(base_prices)
+        flattened = per_call_us(lambda ns: [rules.price(n) for n in ns], workload)
+        rules = PricingRules(base_prices)
+        batch = per_call_us(rules.price_many, workload)
+        print(f"{label:<8} {legacy:>10.2f} {flattened:>10.2f} {batch:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
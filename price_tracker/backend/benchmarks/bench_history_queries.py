@@ -0,0 +1,107 @@
+"""Chart query latency on a large price_history table, with and without the composite index.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_history_queries [--rows 1000000] [--products 1000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.models import Product, PriceHistory, SearchHistory
+from config import Config
+
+
+def populate(rows, products):
+    now = datetime.utcnow()
+    db.session.execute(Product.__table__.insert(), [
+        {'id': i, 'name': f"Benchmark product {i}", 'current_price': 499.99} for i in range(1, products + 1)
+    ])
+    batch = []
+    for i in range(rows):
+        batch.append({
+            'product_id': random.randint(1, products),
+            'price': round(random.uniform(400, 600), 2),
+            'timestamp': now - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+        })
+        if len(batch) == 50000:
+            db.session.execute(PriceHistory.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(PriceHistory.__table__.insert(), batch)
+    db.session.execute(SearchHistory.__table__.insert(), [
+        {'product_id': random.randint(1, products), 'timestamp': now - timedelta(minutes=i)} for i in range(rows // 10)
+    ])
+    db.session.commit()
+
+
+def queries(products):
+    """The queries behind /price_history, /price_average and /api/search_history."""
+    now = datetime.utcnow()
+
+    def price_history():
+        product_id = random.randint(1, products)
+        PriceHistory.query.filter_by(product_id=product_id).order_by(PriceHistory.timestamp).all()
+
+    def price_average_week():
+        product_id = random.randint(1, products)
+        PriceHistory.query.filter(
+            PriceHistory.product_id == product_id,
+            PriceHistory.timestamp >= now - timedelta(days=7)
+        ).order_by(PriceHistory.timestamp).all()
+
+    def search_history_latest():
+        db.session.query(SearchHistory).order_by(SearchHistory.timestamp.desc()).limit(50).all()
+
+    return {'price_history': price_history, 'price_average(week)': price_average_week,
+            'search_history(50)': search_history_latest}
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    path = tempfile.mktemp(suffix='.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        print(f"Populating {args.rows} price_history rows across {args.products} products...")
+        populate(args.rows, args.products)
+
+        indexed = {name: measure(fn, args.repeat) for name, fn in queries(args.products).items()}
+
+        db.session.execute(db.text('DROP INDEX ix_price_history_product_id_timestamp'))
+        db.session.execute(db.text('DROP INDEX ix_search_history_timestamp'))
+        db.session.commit()
+        scanned = {name: measure(fn, max(3, args.repeat // 5)) for name, fn in queries(args.products).items()}
+
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(path)
+
+    print(f"{'query':<22} {'no index ms':>12} {'indexed ms':>12} {'speedup':>8}")
+    for name in indexed:
+        print(f"{name:<22} {scanned[name]:>12.2f} {indexed[name]:>12.2f} {scanned[name] / indexed[name]:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Products created per second: per-row ORM history seeding vs one batched insert.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_product_create [--products 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.history import seed_price_history
+from app.models import Product, PriceHistory, SearchHistory
+from benchmarks.bench_synthetic_history import price_with_time_factor
+from config import Config
+
+
+def legacy_create(name, price):
+    """Product creation as add_product did it before: two commits, one session.add per history row."""
+    product = Product(name=name, current_price=price)
+    db.session.add(product)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    for hour in range(24, 0, -2):
+        db.session.add(PriceHistory(product_id=product.id, timestamp=now - timedelta(hours=hour),
+                                    price=price_with_time_factor(price, hour / 24.0, noise_pct=0.01)))
+    for day in range(7, 0, -1):
+        db.session.add(PriceHistory(product_id=product.id, timestamp=now - timedelta(days=day),
+                                    price=price_with_time_factor(price, day, noise_pct=0.015)))
+    for day in range(30, 0, -3):
+        db.session.add(PriceHistory(product_id=product.id, timestamp=now - timedelta(days=day),
+                                    price=price_with_time_factor(price, day, noise_pct=0.02)))
+    for month in range(12, 0, -1):
+        db.session.add(PriceHistory(product_id=product.id, timestamp=now - timedelta(days=month * 30),
+                                    price=price_with_time_factor(price, month * 30, noise_pct=0.025)))
+    db.session.add(PriceHistory(product_id=product.id, price=price, timestamp=now))
+    db.session.add(SearchHistory(product_id=product.id))
+    db.session.commit()
+
+
+def batched_create(name, price):
+    """Product creation as add_product does it now: one transaction, one executemany."""
+    product = Product(name=name, current_price=price)
+    db.session.add(product)
+    db.session.flush()
+    seed_price_history(product.id, price)
+    db.session.add(SearchHistory(product_id=product.id))
+    db.session.commit()
+
+
+def run(create, count, label):
+    path = tempfile.mktemp(suffix='.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        started = time.perf_counter()
+        for i in range(count):
+            create(f"Benchmark product {i}", 799.99)
+        elapsed = time.perf_counter() - started
+        rows = PriceHistory.query.count()
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(path)
+    print(f"{label:<10} {count / elapsed:>10.1f} products/s  ({elapsed * 1000 / count:.2f} ms each, {rows} history rows)")
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=200)
+    args = parser.parse_args()
+
+    before = run(legacy_create, args.products, 'before')
+    after = run(batched_create, args.products, 'after')
+    print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Product-name lookup latency as the catalog grows: ILIKE '%term%' scan vs the search index.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_product_search [--sizes 10000,100000,300000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app import create_app, db
+from app.models import Product
+from app.product_search import search_products
+from config import Config
+
+BRANDS = ['Apple', 'Samsung', 'Sony', 'Dell', 'Lenovo', 'Asus', 'Acer', 'LG', 'Bose', 'Canon',
+          'Nikon', 'GoPro', 'Garmin', 'Logitech', 'Microsoft', 'Google', 'Xiaomi', 'Philips', 'Dyson', 'Anker']
+KINDS = ['phone', 'laptop', 'tablet', 'monitor', 'headphones', 'speaker', 'camera', 'watch',
+         'keyboard', 'mouse', 'router', 'charger', 'drone', 'tv', 'earbuds', 'projector']
+VARIANTS = ['Pro', 'Max', 'Plus', 'Mini', 'Ultra', 'Lite', 'Air', 'SE', '']
+COLORS = ['Black', 'White', 'Silver', 'Blue', 'Red', 'Green', 'Graphite', 'Gold']
+
+
+def product_name(rng):
+    return ' '.join(part for part in (
+        rng.choice(BRANDS), rng.choice(KINDS), f"{rng.choice('ABCDEFGHKMQRSXZ')}{rng.randint(1, 9999)}",
+        rng.choice(VARIANTS), rng.choice(COLORS), f"{rng.choice([64, 128, 256, 512])}GB"
+    ) if part)
+
+
+def populate(size, start, rng):
+    rows = [{'name': product_name(rng), 'current_price': 499.99} for _ in range(size - start)]
+    for i in range(0, len(rows), 50000):
+        db.session.execute(Product.__table__.insert(), rows[i:i + 50000])
+    db.session.commit()
+
+
+def queries(rng, repeat):
+    """Searches like the ones typed into the search box: a brand plus a model prefix."""
+    return [f"{rng.choice(BRANDS)} {rng.choice('ABCDEFGHKMQRSXZ')}{rng.randint(1, 99)}" for _ in range(repeat)]
+
+
+def measure(fn, terms):
+    timings = []
+    for term in terms:
+        started = time.perf_counter()
+        fn(term)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def ilike_lookup(term):
+    # What /api/products/by-name did before the index: one leading-wildcard scan
+    return Product.query.filter(Product.name.ilike(f"%{term}%")).first()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,300000')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    path = tempfile.mktemp(suffix='.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+
+    rng = random.Random(42)
+    app = create_app(BenchConfig)
+    print(f"{'products':>9} {'ILIKE ms':>10} {'prefix ms':>10} {'fuzzy ms':>10}")
+    with app.app_context():
+        populated = 0
+        for size in sizes:
+            populate(size, populated, rng)
+            populated = size
+            terms = queries(rng, args.repeat)
+            scan = measure(ilike_lookup, terms)
+            prefix = measure(lambda term: search_products(term, limit=20), terms)
+            fuzzy = measure(lambda term: search_products(term, limit=20, mode='fuzzy'), terms)
+            print(f"{size:>9} {scan:>10.2f} {prefix:>10.2f} {fuzzy:>10.2f}")
+
+        db.session.remove()
+        db.engine.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
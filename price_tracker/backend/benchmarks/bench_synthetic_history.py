@@ -0,0 +1,63 @@
+"""Synthetic history generation: one random.uniform call per point vs one vectorized NumPy call.
+
+Usage (from price_tracker/backend):
+    python -m benchmarks.bench_synthetic_history [--products 10000]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.synthetic_history import PERIOD_SCHEDULES, seed_rows, seed_rows_many
+
+
+def price_with_time_factor(current_price, days_ago, monthly_rate=0.02, noise_pct=0.02,
+                           min_floor_pct=0.6, max_ceiling_pct=2.0):
+    """The scalar generator history seeding used before, kept here for comparison."""
+    months_ago = max(0.0, days_ago / 30.0)
+    base = current_price * (1.0 + monthly_rate * months_ago)
+    value = base + random.uniform(-noise_pct, noise_pct) * base
+    value = max(min_floor_pct * current_price, min(max_ceiling_pct * current_price, value))
+    return round(value, 2)
+
+
+def legacy_rows(product_id, price, now):
+    rows = [
+        {
+            'product_id': product_id,
+            'price': price_with_time_factor(price, float(days_ago), noise_pct=noise_pct),
+            'timestamp': now - timedelta(days=float(days_ago))
+        }
+        for offsets, noise_pct in PERIOD_SCHEDULES.values()
+        for days_ago in offsets
+    ]
+    rows.append({'product_id': product_id, 'price': price, 'timestamp': now})
+    return rows
+
+
+def timed(label, generate, count):
+    started = time.perf_counter()
+    rows = generate()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {count / elapsed:>12.0f} products/s  ({len(rows)} rows in {elapsed * 1000:.1f} ms)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=10000)
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    ids = list(range(1, args.products + 1))
+    prices = [random.uniform(5, 2000) for _ in ids]
+
+    scalar = timed('scalar', lambda: [r for i, p in zip(ids, prices) for r in legacy_rows(i, p, now)], args.products)
+    per_product = timed('per product', lambda: [r for i, p in zip(ids, prices) for r in seed_rows(i, p, now)],
+                        args.products)
+    batched = timed('batched', lambda: seed_rows_many(ids, prices, now), args.products)
+    print(f"speedup: {scalar / per_product:.1f}x per product, {scalar / batched:.1f}x batched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Store search-result pages used by the benchmarks.
+
+A real page saved as ``benchmarks/fixtures/<store-slug>.html`` (e.g.
+``best-buy.html``) is used when present. Otherwise a synthetic page of
+similar size and shape is generated: a heavy <head> of inline scripts and
+styles followed by result cards, with the store's price element inside the
+first card, as on a real search page.
+"""
+import os
+import re
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def store_slug(store_name):
+    return re.sub(r'[^a-z0-9]+', '-', store_name.lower()).strip('-')
+
+
+def _price_markup(selector, price_text):
+    """Nest elements so that the store's descendant selector matches the innermost one."""
+    steps = selector.split()
+    opening, closing = '', ''
+    for step in steps:
+        tag, _, classes = step.partition('.')
+        tag = tag or ('span' if step is steps[-1] else 'div')
+        class_attr = ' '.join(c for c in classes.split('.') if c)
+        opening += f'<{tag} class="{class_attr}">' if class_attr else f'<{tag}>'
+        closing = f'</{tag}>' + closing
+    return opening + price_text + closing
+
+
+def synthetic_page(source, price_text='$799.99', results=60, head_kb=400):
+    """Build a search-results page of roughly (head_kb + results * 12) KB."""
+    script = '<script>window.__STATE__ = {"k": "' + 'x' * 1000 + '"};</script>\n'
+    style = '<style>.card{display:flex}.title{font-weight:600}' + '.u{margin:0}' * 80 + '</style>\n'
+    head = (script + style) * max(1, head_kb // 2)
+
+    card = (
+        '<div class="s-result-item" data-component-type="s-search-result">'
+        '<div class="card"><img src="/img/p.jpg" alt="product"><br>'
+        '<h2 class="title"><a href="/p/{i}">Product result {i} with a long descriptive title</a></h2>'
+        '<div class="rating"><span>4.5 out of 5 stars</span><span>(1,234)</span></div>'
+        '{price}'
+        '<ul class="features">' + '<li>Feature text for the product card</li>' * 20 + '</ul>'
+        '</div></div>\n'
+    )
+    price = _price_markup(source['price_selector'], price_text)
+    cards = [card.format(i=0, price=price)]
+    filler = '<div class="no-price">Currently unavailable</div>'
+    cards.extend(card.format(i=i, price=filler) for i in range(1, results))
+
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Search results</title>\n'
+        + head + '</head><body><div id="search"><div class="results">\n'
+        + ''.join(cards) + '</div></div></body></html>'
+    ).encode('utf-8')
+
+
+def load_fixture(source):
+    """Return the saved page for a store if there is one, else a synthetic page."""
+    path = os.path.join(FIXTURES_DIR, store_slug(source['name']) + '.html')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    return synthetic_page(source)
@@ -3,7 +3,109 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def database_url(url):
+    # Hosted Postgres providers hand out postgres:// URLs, which SQLAlchemy 1.4 rejects
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-for-development'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'price_tracker.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False 
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = database_url(os.environ.get('DATABASE_URL')) or 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'price_tracker.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Serverless (Vercel sets VERCEL=1): lean startup without the migrations CLI or schema creation
+    SERVERLESS = (os.environ.get('SERVERLESS') or ('true' if os.environ.get('VERCEL') else 'false')).lower() == 'true'
+    AUTO_CREATE_SCHEMA = (os.environ.get('AUTO_CREATE_SCHEMA') or ('false' if SERVERLESS else 'true')).lower() == 'true'
+    
+    # Postgres profile: per-worker connection pool and per-session limits
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    DB_POOL_TIMEOUT_SECONDS = float(os.environ.get('DB_POOL_TIMEOUT_SECONDS') or 10)
+    DB_POOL_RECYCLE_SECONDS = int(os.environ.get('DB_POOL_RECYCLE_SECONDS') or 1800)
+    DB_POOL_PRE_PING = (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() == 'true'
+    DB_CONNECT_TIMEOUT_SECONDS = int(os.environ.get('DB_CONNECT_TIMEOUT_SECONDS') or 5)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS') or 15000)
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.environ.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS') or 60000)
+    DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME') or 'price-tracker'
+    
+    # SQLite production profile: pragmas applied on every connection, pool of open connections
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'wal'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'normal'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE') or -64000)  # negative = KiB
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE') or 8)
+    
+    # Single writer thread for SQLite: jobs waiting within the window are committed together
+    WRITE_QUEUE_ENABLED = (os.environ.get('WRITE_QUEUE_ENABLED') or 'true').lower() == 'true'
+    WRITE_QUEUE_BATCH_SIZE = int(os.environ.get('WRITE_QUEUE_BATCH_SIZE') or 64)
+    WRITE_QUEUE_BATCH_WINDOW_MS = float(os.environ.get('WRITE_QUEUE_BATCH_WINDOW_MS') or 5)
+    WRITE_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('WRITE_QUEUE_TIMEOUT_SECONDS') or 30)
+    
+    # Scraping: per-request timeout, overall deadline for multi-store lookups, pool size
+    SCRAPE_TIMEOUT_SECONDS = float(os.environ.get('SCRAPE_TIMEOUT_SECONDS') or 10)
+    SCRAPE_DEADLINE_SECONDS = float(os.environ.get('SCRAPE_DEADLINE_SECONDS') or 8)
+    SCRAPE_MAX_WORKERS = int(os.environ.get('SCRAPE_MAX_WORKERS') or 8)
+    SCRAPE_STORE_CONCURRENCY = int(os.environ.get('SCRAPE_STORE_CONCURRENCY') or 2)
+    BATCH_REFRESH_MAX_PRODUCTS = int(os.environ.get('BATCH_REFRESH_MAX_PRODUCTS') or 100)
+    
+    # Pooled keep-alive sessions: sockets per store host, global socket cap, retries on connect errors/5xx/429
+    SCRAPE_POOL_MAXSIZE = int(os.environ.get('SCRAPE_POOL_MAXSIZE') or 4)
+    SCRAPE_MAX_CONNECTIONS = int(os.environ.get('SCRAPE_MAX_CONNECTIONS') or 32)
+    SCRAPE_RETRIES = int(os.environ.get('SCRAPE_RETRIES') or 2)
+    SCRAPE_RETRY_BACKOFF = float(os.environ.get('SCRAPE_RETRY_BACKOFF') or 0.3)
+    
+    # Scrape result cache: TTLs for prices and failed lookups, LRU size, optional shared SQLite backend
+    SCRAPE_CACHE_TTL = float(os.environ.get('SCRAPE_CACHE_TTL') or 900)
+    SCRAPE_CACHE_NEGATIVE_TTL = float(os.environ.get('SCRAPE_CACHE_NEGATIVE_TTL') or 120)
+    SCRAPE_CACHE_SIZE = int(os.environ.get('SCRAPE_CACHE_SIZE') or 1024)
+    SCRAPE_CACHE_BACKEND = os.environ.get('SCRAPE_CACHE_BACKEND') or 'memory'
+    SCRAPE_CACHE_PATH = os.environ.get('SCRAPE_CACHE_PATH') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'scrape_cache.db')
+    
+    # Price extractor: auto (fastest available), selectolax, lxml, scan or soup
+    SCRAPE_EXTRACTOR = os.environ.get('SCRAPE_EXTRACTOR') or 'auto'
+    
+    # Scraping backend: threads (pooled requests sessions) or async (aiohttp on one event loop)
+    SCRAPE_BACKEND = os.environ.get('SCRAPE_BACKEND') or 'threads'
+    SCRAPE_ASYNC_MAX_CONCURRENCY = int(os.environ.get('SCRAPE_ASYNC_MAX_CONCURRENCY') or 64)
+    SCRAPE_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('SCRAPE_CONNECT_TIMEOUT_SECONDS') or 3)
+    SCRAPE_READ_TIMEOUT_SECONDS = float(os.environ.get('SCRAPE_READ_TIMEOUT_SECONDS') or 10)
+    
+    # Per-store request rate (0 disables) and circuit breaker
+    SCRAPE_RATE_LIMIT_PER_SECOND = float(os.environ.get('SCRAPE_RATE_LIMIT_PER_SECOND') or 4)
+    SCRAPE_RATE_LIMIT_BURST = int(os.environ.get('SCRAPE_RATE_LIMIT_BURST') or 8)
+    SCRAPE_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get('SCRAPE_RATE_LIMIT_MAX_WAIT_SECONDS') or 2)
+    SCRAPE_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('SCRAPE_BREAKER_FAILURE_THRESHOLD') or 5)
+    SCRAPE_BREAKER_RESET_SECONDS = float(os.environ.get('SCRAPE_BREAKER_RESET_SECONDS') or 30)
+    
+    # Background refresh worker (flask refresh-worker run): tick, per-product intervals, batch size
+    REFRESH_WORKER_TICK_SECONDS = float(os.environ.get('REFRESH_WORKER_TICK_SECONDS') or 60)
+    REFRESH_WORKER_JITTER = float(os.environ.get('REFRESH_WORKER_JITTER') or 0.2)
+    REFRESH_INTERVAL_SECONDS = float(os.environ.get('REFRESH_INTERVAL_SECONDS') or 6 * 3600)
+    REFRESH_HOT_INTERVAL_SECONDS = float(os.environ.get('REFRESH_HOT_INTERVAL_SECONDS') or 1800)
+    REFRESH_HOT_WINDOW_SECONDS = float(os.environ.get('REFRESH_HOT_WINDOW_SECONDS') or 24 * 3600)
+    REFRESH_BATCH_SIZE = int(os.environ.get('REFRESH_BATCH_SIZE') or 50)
+    REFRESH_BATCH_DEADLINE_SECONDS = float(os.environ.get('REFRESH_BATCH_DEADLINE_SECONDS') or 60)
+    REFRESH_WORKER_STORE = os.environ.get('REFRESH_WORKER_STORE') or None
+    REFRESH_WORKER_USE_FALLBACK = (os.environ.get('REFRESH_WORKER_USE_FALLBACK') or 'false').lower() == 'true'
+    # Products whose scrapes keep failing wait twice as long after each miss, up to this
+    REFRESH_FAILURE_BACKOFF_MAX_SECONDS = float(os.environ.get('REFRESH_FAILURE_BACKOFF_MAX_SECONDS') or 24 * 3600)
+    
+    # HTTP caching for read endpoints: how long the Vercel edge may reuse a product response
+    HTTP_CACHE_S_MAXAGE = int(os.environ.get('HTTP_CACHE_S_MAXAGE') or 30)
+    HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get('HTTP_CACHE_STALE_WHILE_REVALIDATE') or 60)
+    
+    # Server-side LRU of computed /price_average payloads
+    PRICE_AVERAGE_CACHE_SIZE = int(os.environ.get('PRICE_AVERAGE_CACHE_SIZE') or 512)
+    
+    # Logging level for the app's loggers (DEBUG logs every scrape and request), and the /metrics endpoint
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() == 'true'
+
+class TestingConfig(Config):
+    """Runs against TEST_DATABASE_URL (e.g. a Postgres instance) when set, otherwise an in-memory SQLite database."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = database_url(os.environ.get('TEST_DATABASE_URL')) or 'sqlite://'
+    SCRAPE_CACHE_BACKEND = 'memory'
+    REFRESH_WORKER_USE_FALLBACK = True
@@ -0,0 +1,54 @@
+"""initial schema
+
+Revision ID: 0001_initial_schema
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by db.create_all() before migrations existed already
+    # have these tables; only create what is missing so they can be stamped forward.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'product' not in existing:
+        op.create_table('product',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('current_price', sa.Float(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'price_history' not in existing:
+        op.create_table('price_history',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'search_history' not in existing:
+        op.create_table('search_history',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.Column('user_id', sa.String(length=100), nullable=True),
+            sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('search_history')
+    op.drop_table('price_history')
+    op.drop_table('product')
@@ -0,0 +1,35 @@
+"""composite index on price_history(product_id, timestamp), index on search_history(timestamp)
+
+Revision ID: 0002_history_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_history_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+def _index_names(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # create_all() may already have built these from the model definitions
+    if 'ix_price_history_product_id_timestamp' not in _index_names('price_history'):
+        op.create_index('ix_price_history_product_id_timestamp', 'price_history',
+                        ['product_id', 'timestamp'], unique=False)
+    if 'ix_search_history_timestamp' not in _index_names('search_history'):
+        op.create_index('ix_search_history_timestamp', 'search_history',
+                        ['timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_search_history_timestamp', table_name='search_history')
+    op.drop_index('ix_price_history_product_id_timestamp', table_name='price_history')
@@ -0,0 +1,41 @@
+"""price_rollup table with hourly/daily/monthly aggregates per product
+
+Revision ID: 0003_price_rollups
+Revises: 0002_history_indexes
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_price_rollups'
+down_revision = '0002_history_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'price_rollup' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('price_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('min_price', sa.Float(), nullable=False),
+        sa.Column('max_price', sa.Float(), nullable=False),
+        sa.Column('last_price', sa.Float(), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'granularity', 'bucket_start', name='uq_price_rollup_bucket')
+    )
+    # Existing history is folded in with `flask rollups rebuild`
+
+
+def downgrade():
+    op.drop_table('price_rollup')
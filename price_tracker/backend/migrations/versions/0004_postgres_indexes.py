@@ -0,0 +1,34 @@
+"""index on search_history(product_id); BRIN index on price_history(timestamp) on Postgres
+
+Revision ID: 0004_postgres_indexes
+Revises: 0003_price_rollups
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_postgres_indexes'
+down_revision = '0003_price_rollups'
+branch_labels = None
+depends_on = None
+
+
+def _index_names(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    if 'ix_search_history_product_id' not in _index_names('search_history'):
+        op.create_index('ix_search_history_product_id', 'search_history', ['product_id'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE INDEX IF NOT EXISTS ix_price_history_timestamp_brin '
+                   'ON price_history USING brin (timestamp)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_price_history_timestamp_brin')
+    op.drop_index('ix_search_history_product_id', table_name='search_history')
@@ -0,0 +1,60 @@
+"""product name index; FTS5 search table (SQLite) or trigram index (Postgres) over product names
+
+Revision ID: 0005_product_search
+Revises: 0004_postgres_indexes
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_product_search'
+down_revision = '0004_postgres_indexes'
+branch_labels = None
+depends_on = None
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5("
+    "name, content='product', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON product BEGIN "
+    "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON product BEGIN "
+    "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE OF name ON product BEGIN "
+    "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END",
+    # Index the products that already exist
+    "INSERT INTO product_fts(product_fts) VALUES ('rebuild')",
+]
+
+
+def _index_names(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'ix_product_name' not in _index_names('product'):
+        op.create_index('ix_product_name', 'product', ['name'], unique=False)
+
+    if bind.dialect.name == 'sqlite':
+        if bind.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+            for statement in SQLITE_FTS:
+                op.execute(statement)
+    elif bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX IF NOT EXISTS ix_product_name_trgm ON product USING gin (lower(name) gin_trgm_ops)')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for trigger in ('product_fts_insert', 'product_fts_delete', 'product_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS product_fts')
+    elif bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_product_name_trgm')
+    op.drop_index('ix_product_name', table_name='product')
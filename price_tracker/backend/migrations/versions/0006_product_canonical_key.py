@@ -0,0 +1,52 @@
+"""product.canonical_key with a unique index, replacing the plain index on product.name
+
+Revision ID: 0006_product_canonical_key
+Revises: 0005_product_search
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.normalization import canonical_key
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_product_canonical_key'
+down_revision = '0005_product_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'canonical_key' not in {column['name'] for column in inspector.get_columns('product')}:
+        # Plain ADD COLUMN; batch mode would rebuild the table and drop its search triggers
+        op.add_column('product', sa.Column('canonical_key', sa.String(length=100), nullable=True))
+
+    # Backfill; when several existing products share a key the oldest keeps it and the
+    # others stay NULL (still listed, but no longer matched when a product is added)
+    seen = set()
+    updates = []
+    for product_id, name in bind.execute(sa.text('SELECT id, name FROM product ORDER BY id')):
+        key = canonical_key(name)
+        updates.append({'id': product_id, 'key': None if key in seen else key})
+        seen.add(key)
+    if updates:
+        bind.execute(sa.text('UPDATE product SET canonical_key = :key WHERE id = :id'), updates)
+    duplicates = sum(1 for update in updates if update['key'] is None)
+    if duplicates:
+        print(f"{duplicates} products duplicate an older product's name and were left without a canonical key")
+
+    indexes = {index['name'] for index in inspector.get_indexes('product')}
+    if 'ix_product_name' in indexes:
+        op.drop_index('ix_product_name', table_name='product')
+    if 'uq_product_canonical_key' not in indexes:
+        op.create_index('uq_product_canonical_key', 'product', ['canonical_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_product_canonical_key', table_name='product')
+    op.create_index('ix_product_name', 'product', ['name'], unique=False)
+    op.drop_column('product', 'canonical_key')
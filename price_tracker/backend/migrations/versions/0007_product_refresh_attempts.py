@@ -0,0 +1,30 @@
+"""product.refresh_attempted_at and product.refresh_failures for the refresh worker's backoff
+
+Revision ID: 0007_product_refresh_attempts
+Revises: 0006_product_canonical_key
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_product_refresh_attempts'
+down_revision = '0006_product_canonical_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('product')}
+    # Plain ADD COLUMN; batch mode would rebuild the table and drop its search triggers
+    if 'refresh_attempted_at' not in columns:
+        op.add_column('product', sa.Column('refresh_attempted_at', sa.DateTime(), nullable=True))
+    if 'refresh_failures' not in columns:
+        op.add_column('product', sa.Column('refresh_failures', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('product', 'refresh_failures')
+    op.drop_column('product', 'refresh_attempted_at')
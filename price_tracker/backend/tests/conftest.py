@@ -0,0 +1,29 @@
+"""Fixtures for tests run against config.TestingConfig.
+
+Set TEST_DATABASE_URL to run the suite against Postgres; otherwise every test
+gets its own in-memory SQLite database.
+"""
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    app = create_app('config.TestingConfig')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        # In-memory SQLite goes away with the engine; a shared Postgres database is emptied
+        if db.engine.dialect.name != 'sqlite':
+            db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def dialect(app):
+    return db.engine.dialect.name
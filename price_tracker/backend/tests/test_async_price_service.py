@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from contextlib import suppress
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.async_price_service import AsyncPriceService
+from app.resilience import CircuitBreaker, StoreGuards
+from app.scrape_cache import ScrapeCache, SqliteCacheBackend
+
+
+class StubStore(BaseHTTPRequestHandler):
+    """Search page with a price; /slow/ paths answer after a second."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith('/slow/'):
+            time.sleep(1)
+        body = b'<html><span class="price">$123.45</span></html>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def store_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubStore)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def service():
+    service = AsyncPriceService(timeout=5, deadline=5)
+    yield service
+    service.close()
+    service.bridge.close()
+
+
+def use_store(service, url):
+    service.sources = [{'name': 'Stub', 'url': url + '?q={query}', 'price_selector': '.price'}]
+    return service.sources[0]
+
+
+def half_open_breaker(service, **guards):
+    service.guards = StoreGuards(failure_threshold=1, reset_timeout=0.2, **guards)
+    _, breaker = service.guards.get('Stub')
+    breaker.record_failure()
+    time.sleep(0.25)
+    return breaker
+
+
+def settled(condition, timeout=2.0):
+    # Cancelled flights finish on the loop just after the caller has its answer
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_scrapes_and_caches(service, store_url):
+    source = use_store(service, store_url + '/fast/')
+    service.guards = StoreGuards(rate=0)
+
+    assert service.get_many_product_prices(['widget'])['widget']['status'] == 'ok'
+    assert service.get_many_product_prices(['widget'])['widget']['status'] == 'cached'
+    assert service.scrape_price(source, 'widget') == 123.45
+
+
+def test_sqlite_cache_backend(service, store_url, tmp_path):
+    use_store(service, store_url + '/fast/')
+    service.guards = StoreGuards(rate=0)
+    service.cache = ScrapeCache(backend=SqliteCacheBackend(str(tmp_path / 'cache.db')))
+
+    assert service.get_many_product_prices(['widget'])['widget']['price'] == 123.45
+    service.cache._entries.clear()
+    # Served from the shared backend, not the store
+    assert service.get_many_product_prices(['widget'])['widget']['status'] == 'cached'
+
+
+def cancel_after(service, source, seconds):
+    """Start a scrape on the bridge loop and cancel its only waiter after seconds."""
+    async def caller_gives_up():
+        scrape = asyncio.ensure_future(service._cached_scrape_async(source, 'widget'))
+        await asyncio.sleep(seconds)
+        scrape.cancel()
+        with suppress(asyncio.CancelledError):
+            await scrape
+
+    service.bridge.run(caller_gives_up())
+
+
+def test_deadline_cancels_a_slow_scrape(service, store_url):
+    use_store(service, store_url + '/slow/')
+    service.guards = StoreGuards(rate=0)
+
+    result = service.get_many_product_prices(['widget'], deadline=0.2, use_fallback=False)
+
+    assert result['widget']['status'] == 'timeout'
+    assert settled(lambda: service.inflight.stats()['in_flight'] == 0)
+
+
+def test_probe_cancelled_mid_request_reopens_the_breaker(service, store_url):
+    source = use_store(service, store_url + '/slow/')
+    breaker = half_open_breaker(service, rate=0)
+
+    # The request (5s timeout) is in flight when the caller goes away
+    cancel_after(service, source, 0.2)
+
+    assert settled(lambda: service.inflight.stats()['in_flight'] == 0)
+    # The cancelled probe counted as a timeout: open again, not stuck probing
+    assert settled(lambda: breaker.state == CircuitBreaker.OPEN)
+    assert not breaker._probing
+
+
+def test_probe_cancelled_while_rate_limited_is_released(service, store_url):
+    source = use_store(service, store_url + '/fast/')
+    breaker = half_open_breaker(service, rate=1, burst=1, max_wait=5)
+    bucket, _ = service.guards.get('Stub')
+    bucket.reserve(0)
+
+    # The probe is still waiting for a rate-limit slot when the caller goes away
+    cancel_after(service, source, 0.1)
+
+    assert settled(lambda: service.inflight.stats()['in_flight'] == 0)
+    # No request was made, so the probe is handed back and the next call may probe at once
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
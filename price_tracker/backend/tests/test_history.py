@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.history import downsampled_price_points, insert_price_history
+from app.models import Product
+
+pytestmark = pytest.mark.usefixtures('app')
+
+
+def add_history(prices):
+    product = Product(name='Test Monitor', current_price=100.0)
+    db.session.add(product)
+    db.session.flush()
+    insert_price_history([
+        {'product_id': product.id, 'price': price, 'timestamp': timestamp} for timestamp, price in prices
+    ])
+    db.session.commit()
+    return product.id
+
+
+def test_week_buckets_start_on_monday():
+    product_id = add_history([
+        (datetime(2025, 3, 3, 9), 100.0),   # Monday
+        (datetime(2025, 3, 9, 23), 110.0),  # Sunday, same week
+        (datetime(2025, 3, 10, 0), 200.0),  # Monday, next week
+    ])
+
+    points = downsampled_price_points(product_id, datetime(2025, 1, 1), 'week')
+
+    assert [(p['count'], p['price']) for p in points] == [(2, 105.0), (1, 200.0)]
+    assert points[0]['timestamp'] == datetime(2025, 3, 3, 9).isoformat()
+
+
+def test_week_bucket_spanning_new_year_is_not_split():
+    # Monday 2024-12-30 to Sunday 2025-01-05 is one week, as date_trunc('week') has it
+    start = datetime(2024, 12, 30, 12)
+    product_id = add_history([(start + timedelta(days=day), 100.0 + day) for day in range(7)])
+
+    points = downsampled_price_points(product_id, datetime(2024, 12, 1), 'week')
+
+    assert len(points) == 1
+    assert points[0]['count'] == 7
+    assert points[0]['price'] == 103.0
+
+
+def test_day_buckets():
+    product_id = add_history([
+        (datetime(2025, 3, 3, 1), 10.0),
+        (datetime(2025, 3, 3, 23), 20.0),
+        (datetime(2025, 3, 4, 0), 30.0),
+    ])
+
+    points = downsampled_price_points(product_id, datetime(2025, 3, 1), 'day')
+
+    assert [(p['count'], p['min_price'], p['max_price']) for p in points] == [(2, 10.0, 20.0), (1, 30.0, 30.0)]
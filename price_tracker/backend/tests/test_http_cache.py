@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.history import insert_price_history
+from app.models import Product
+
+
+@pytest.fixture
+def product_id(app):
+    product = Product(name='Test Monitor', current_price=100.0)
+    db.session.add(product)
+    db.session.flush()
+    insert_price_history([{'product_id': product.id, 'price': 100.0, 'timestamp': datetime(2025, 3, 3, 9)}])
+    db.session.commit()
+    return product.id
+
+
+def test_only_the_product_view_is_edge_cached(client, product_id):
+    product = client.get(f'/api/products/{product_id}')
+    assert 's-maxage=' in product.headers['Cache-Control']
+
+    # Re-read right after a refresh, so never served stale from the edge
+    for path in ('price_history', 'price_average?period=year'):
+        response = client.get(f'/api/products/{product_id}/{path}')
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+
+
+def test_matching_etag_gets_not_modified(client, product_id):
+    url = f'/api/products/{product_id}/price_history'
+    etag = client.get(url).headers['ETag']
+
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_if_modified_since_needs_a_later_date(client, product_id):
+    url = f'/api/products/{product_id}/price_history'
+    last_modified = client.get(url).headers['Last-Modified']
+
+    assert client.get(url, headers={'If-Modified-Since': 'Mon, 03 Mar 2025 09:00:01 GMT'}).status_code == 304
+    # Same second as the latest write: another write may have landed within it
+    assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 200
+
+
+def test_second_write_in_the_same_second_is_not_hidden(client, product_id):
+    url = f'/api/products/{product_id}/price_history'
+    last_modified = client.get(url).headers['Last-Modified']
+    insert_price_history([{'product_id': product_id, 'price': 90.0, 'timestamp': datetime(2025, 3, 3, 9, 0, 0, 500000)}])
+    db.session.commit()
+
+    response = client.get(url, headers={'If-Modified-Since': last_modified})
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+
+def test_daily_view_ignores_if_modified_since(client, product_id):
+    url = f'/api/products/{product_id}/price_average?period=today'
+    response = client.get(url, headers={'If-Modified-Since': 'Wed, 01 Jan 2099 00:00:00 GMT'})
+
+    # The window moved at midnight without a write; only the ETag (which carries the date) can say unchanged
+    assert response.status_code == 200
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import PriceHistory, Product, SearchHistory
+from app.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def product_id(app):
+    product = Product(name='Test Monitor', current_price=100.0)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def all_pages(client, url, limit=2):
+    ids, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids += [row['id'] for row in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f"{url.split('?')[0]}?limit={limit}&cursor={cursor}" if cursor else None
+        pages += 1
+    return ids, pages
+
+
+def test_cursor_round_trips_null():
+    cursor = encode_cursor([None, 7])
+    assert decode_cursor(cursor, [datetime, int]) == [None, 7]
+
+
+def test_price_history_pages_across_null_timestamps(client, product_id):
+    rows = [PriceHistory(product_id=product_id, price=float(i), timestamp=datetime(2025, 3, i)) for i in (1, 2, 3)]
+    rows += [PriceHistory(product_id=product_id, price=0.0) for _ in range(2)]
+    db.session.add_all(rows)
+    db.session.commit()
+    # Timestamps are only defaulted on insert; clear them afterwards as legacy rows would be
+    null_ids = [row.id for row in rows[3:]]
+    PriceHistory.query.filter(PriceHistory.id.in_(null_ids)).update(
+        {'timestamp': None}, synchronize_session=False)
+    db.session.commit()
+    dated_ids = [row.id for row in rows[:3]]
+
+    ids, pages = all_pages(client, f'/api/products/{product_id}/price_history?limit=2')
+
+    # NULL timestamps sort last, by id
+    assert ids == dated_ids + sorted(null_ids)
+    assert pages == 3
+    assert client.get(f'/api/products/{product_id}/price_history').get_json()[-1]['timestamp'] is None
+
+
+def test_descending_pages_start_with_null_timestamps(client, product_id):
+    rows = [SearchHistory(product_id=product_id, timestamp=datetime(2025, 3, i)) for i in (1, 2, 3)]
+    rows += [SearchHistory(product_id=product_id) for _ in range(2)]
+    db.session.add_all(rows)
+    db.session.commit()
+    null_ids = [row.id for row in rows[3:]]
+    SearchHistory.query.filter(SearchHistory.id.in_(null_ids)).update(
+        {'timestamp': None}, synchronize_session=False)
+    db.session.commit()
+
+    ids, _ = all_pages(client, '/api/search_history?limit=2')
+
+    assert ids == sorted(null_ids, reverse=True) + [rows[2].id, rows[1].id, rows[0].id]
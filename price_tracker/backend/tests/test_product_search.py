@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from app import db, product_search
+from app.models import Product
+from app.product_search import search_products
+
+NAMES = ['iPhone 15 Pro', 'iPhone 15 Pro Max', 'iPhone 14', 'Galaxy S24 Ultra', 'Sony WH-1000XM5 Headphones']
+
+
+@pytest.fixture
+def catalog(app):
+    db.session.add_all(Product(name=name, current_price=100.0) for name in NAMES)
+    db.session.commit()
+
+
+def names(products):
+    return [product.name for product in products]
+
+
+def test_index_is_created_with_the_schema(catalog, dialect):
+    if dialect not in product_search.INDEX_CHECKS:
+        pytest.skip('no search index on this database')
+    assert product_search.index_ready()
+
+
+def test_prefix_needs_every_word(catalog):
+    results = names(search_products('iphone 15'))
+    assert set(results) == {'iPhone 15 Pro', 'iPhone 15 Pro Max'}
+    assert search_products('iphone 13') == []
+
+
+def test_prefix_matches_word_prefixes_on_sqlite(catalog, dialect):
+    if dialect != 'sqlite':
+        pytest.skip('word-prefix matching is FTS5 behaviour')
+    assert names(search_products('iph 15 max')) == ['iPhone 15 Pro Max']
+
+
+def test_fuzzy_tops_up_with_partial_matches(catalog):
+    results = names(search_products('galaxy headphones', mode='fuzzy'))
+    assert set(results) == {'Galaxy S24 Ultra', 'Sony WH-1000XM5 Headphones'}
+    assert search_products('galaxy headphones') == []
+
+
+def test_fuzzy_tolerates_typos_on_postgres(catalog, dialect):
+    if dialect != 'postgresql':
+        pytest.skip('trigram similarity is Postgres only')
+    assert 'Galaxy S24 Ultra' in names(search_products('galaxi ultra', mode='fuzzy'))
+
+
+def test_search_input_is_not_fts_syntax(catalog):
+    assert search_products('"iphone" OR NEAR(') == []
+    assert search_products('*') == []
+
+
+def test_falls_back_to_like_without_the_index(catalog, monkeypatch):
+    monkeypatch.setattr(product_search, 'index_ready', lambda: False)
+
+    assert set(names(search_products('PHONE 15'))) == {'iPhone 15 Pro', 'iPhone 15 Pro Max'}
+    # Shortest name first
+    assert names(search_products('galaxy headphones', mode='fuzzy')) == [
+        'Galaxy S24 Ultra', 'Sony WH-1000XM5 Headphones']
+
+
+def test_unknown_mode_is_rejected(app):
+    with pytest.raises(ValueError):
+        search_products('iphone', mode='regex')
+
+
+def test_missing_index_is_looked_for_again(catalog, dialect, monkeypatch):
+    if dialect not in product_search.INDEX_CHECKS:
+        pytest.skip('no search index on this database')
+    url = str(db.engine.url)
+    # As if this process had checked before the migration created the index
+    monkeypatch.setattr(product_search, '_index_ready', set())
+    monkeypatch.setattr(product_search, '_index_checked_at', {url: time.monotonic()})
+    assert not product_search.index_ready()
+
+    product_search._index_checked_at[url] -= product_search.INDEX_RECHECK_SECONDS
+    assert product_search.index_ready()
@@ -0,0 +1,82 @@
+from app import db, routes
+from app.models import Product, SearchHistory
+
+
+def stub_price(monkeypatch, price=499.99, before=None):
+    """Replace the store lookup in add_product; before() runs first, e.g. to create a competing row."""
+    calls = []
+
+    def fetch_price(product_name, store=None):
+        calls.append(product_name)
+        if before:
+            before()
+        return price, None
+
+    monkeypatch.setattr(routes, 'fetch_price', fetch_price)
+    return calls
+
+
+def test_add_product_returns_existing_product_under_another_spelling(client, monkeypatch):
+    calls = stub_price(monkeypatch)
+
+    created = client.post('/api/products', json={'name': 'iPhone 15 Pro 256 GB '})
+    again = client.post('/api/products', json={'name': 'IPHONE-15 PRO (256 gigabytes)'})
+
+    assert created.status_code == 201
+    assert again.status_code == 200
+    assert again.get_json()['id'] == created.get_json()['id']
+    assert again.get_json()['name'] == 'iPhone 15 Pro 256 GB'
+    # Only the first add scraped
+    assert calls == ['iPhone 15 Pro 256 GB']
+    assert Product.query.count() == 1
+    assert SearchHistory.query.count() == 2
+
+
+def test_add_product_race_returns_the_row_that_won(client, monkeypatch):
+    def competing_insert():
+        # Another request creates the product while this one is scraping
+        db.session.add(Product(name='galaxy s24 ultra', current_price=899.99))
+        db.session.commit()
+
+    stub_price(monkeypatch, before=competing_insert)
+
+    response = client.post('/api/products', json={'name': 'Galaxy S24 Ultra'})
+
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'galaxy s24 ultra'
+    assert response.get_json()['current_price'] == 899.99
+    assert Product.query.count() == 1
+
+
+def test_canonical_key_is_unique(app):
+    db.session.add(Product(name='Sony WH-1000XM5', current_price=1.0))
+    db.session.commit()
+    db.session.add(Product(name='sony wh 1000xm5', current_price=2.0))
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        assert 'unique' in str(e).lower()
+    else:
+        raise AssertionError('duplicate canonical key was inserted')
+
+
+def test_by_name_uses_canonical_key_then_search(client, monkeypatch):
+    stub_price(monkeypatch)
+    client.post('/api/products', json={'name': 'Galaxy S24 Ultra'})
+
+    assert client.get('/api/products/by-name?name=galaxy-s24 ULTRA').get_json()['name'] == 'Galaxy S24 Ultra'
+    assert client.get('/api/products/by-name?name=s24').get_json()['name'] == 'Galaxy S24 Ultra'
+    assert client.get('/api/products/by-name?name=pixel').status_code == 404
+
+
+def test_batch_refresh_validates_ids_and_fallback(client):
+    for body, error in [
+        ({'product_ids': [True]}, 'product_ids must be integers'),
+        ({'product_ids': [1, False]}, 'product_ids must be integers'),
+        ({'product_ids': [1], 'fallback': 'no'}, 'fallback must be a boolean'),
+        ({'product_ids': [1], 'fallback': 0}, 'fallback must be a boolean'),
+    ]:
+        response = client.post('/api/products/refresh', json=body)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == error
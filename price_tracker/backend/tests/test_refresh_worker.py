@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Product, SearchHistory
+from app.refresh_worker import RefreshWorker
+
+pytestmark = pytest.mark.usefixtures('app')
+
+
+class StubPriceService:
+    """Answers every name in prices; the rest fail like an unreachable store."""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.batches = []
+
+    def get_many_product_prices(self, names, **kwargs):
+        self.batches.append(list(names))
+        self.in_transaction = db.session().in_transaction()
+        return {
+            name: {'price': self.prices.get(name), 'status': 'ok' if name in self.prices else 'error'}
+            for name in names
+        }
+
+
+def make_worker(app, prices, **config):
+    config = dict(app.config, REFRESH_WORKER_JITTER=0, REFRESH_INTERVAL_SECONDS=3600,
+                  REFRESH_FAILURE_BACKOFF_MAX_SECONDS=4 * 3600, **config)
+    return RefreshWorker(StubPriceService(prices), config)
+
+
+def add_products(*names):
+    products = [Product(name=name, current_price=10.0) for name in names]
+    db.session.add_all(products)
+    db.session.commit()
+    return [product.id for product in products]
+
+
+def test_failed_scrapes_are_recorded_and_not_retried_every_tick(app):
+    healthy_id, dead_id = add_products('Healthy Lamp', 'Dead Lamp')
+    worker = make_worker(app, {'Healthy Lamp': 12.0})
+
+    assert worker.run_once() == 1
+    dead = db.session.get(Product, dead_id)
+    assert dead.refresh_failures == 1
+    assert dead.refresh_attempted_at is not None
+    assert db.session.get(Product, healthy_id).refresh_failures == 0
+
+    # Neither product is due again within the interval
+    assert worker.due_products() == []
+
+
+def test_failing_products_back_off_up_to_the_cap(app):
+    dead_id, = add_products('Dead Lamp')
+    worker = make_worker(app, {})
+    attempted = datetime.utcnow()
+
+    def due_after(hours, failures):
+        Product.query.filter_by(id=dead_id).update(
+            {'refresh_attempted_at': attempted, 'refresh_failures': failures})
+        return bool(worker.due_products(now=attempted + timedelta(hours=hours, seconds=1)))
+
+    assert due_after(1, failures=0)
+    # One failure doubles the interval, two quadruple it
+    assert not due_after(1, failures=1)
+    assert due_after(2, failures=1)
+    assert not due_after(3, failures=2)
+    assert due_after(4, failures=2)
+    # Capped at REFRESH_FAILURE_BACKOFF_MAX_SECONDS however long it has been failing
+    assert due_after(4, failures=50)
+
+
+def test_dead_products_do_not_starve_healthy_ones(app):
+    dead_ids = add_products('Dead A', 'Dead B')
+    healthy_id, = add_products('Healthy Lamp')
+    # The dead products are hot and would sort first if they stayed due
+    db.session.add_all(SearchHistory(product_id=product_id) for product_id in dead_ids)
+    db.session.commit()
+    worker = make_worker(app, {'Healthy Lamp': 12.0}, REFRESH_BATCH_SIZE=2)
+
+    worker.run_once()
+    worker.run_once()
+
+    first, second = worker.price_service.batches
+    assert set(first) == {'Dead A', 'Dead B'}
+    assert second == ['Healthy Lamp']
+    assert db.session.get(Product, healthy_id).current_price == 12.0
+
+
+def test_no_transaction_is_held_while_scraping(app):
+    add_products('Healthy Lamp')
+    worker = make_worker(app, {'Healthy Lamp': 12.0})
+
+    assert worker.run_once() == 1
+    assert worker.price_service.in_transaction is False
@@ -0,0 +1,62 @@
+import time
+
+from app.resilience import CircuitBreaker, TokenBucket
+
+
+def open_breaker(reset_timeout):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_breaker_opens_and_a_successful_probe_closes_it():
+    breaker = open_breaker(reset_timeout=0.05)
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = open_breaker(reset_timeout=0.05)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_released_probe_lets_the_next_call_probe():
+    breaker = open_breaker(reset_timeout=0.05)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release()
+
+    assert breaker.allow()
+
+
+def test_lost_probe_expires():
+    breaker = open_breaker(reset_timeout=0.05)
+    time.sleep(0.06)
+    # The probe's caller goes away without recording anything
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_token_bucket_refuses_beyond_max_wait():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.reserve(max_wait=0) == 0.0
+    assert bucket.reserve(max_wait=0) is None
+    assert 0 < bucket.reserve(max_wait=1) <= 0.1
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.history import insert_price_history
+from app.models import PriceHistory, PriceRollup, Product
+from app.rollups import rebuild_rollups, record_prices, rollup_summary
+
+pytestmark = pytest.mark.usefixtures('app')
+
+
+def add_product():
+    product = Product(name='Test Monitor', current_price=100.0)
+    db.session.add(product)
+    db.session.flush()
+    return product.id
+
+
+def day_rollup(product_id):
+    return PriceRollup.query.filter_by(product_id=product_id, granularity='day').populate_existing().one()
+
+
+def test_prices_landing_in_an_existing_bucket_are_added_in_sql():
+    product_id = add_product()
+    insert_price_history([{'product_id': product_id, 'price': 100.0, 'timestamp': datetime(2025, 3, 3, 9)}])
+    db.session.commit()
+    # Loaded, then changed behind this session's back by another writer
+    loaded = day_rollup(product_id)
+    db.session.execute(PriceRollup.__table__.update().values(
+        count=PriceRollup.count + 1, total=PriceRollup.total + 300.0, max_price=300.0))
+
+    record_prices([
+        {'product_id': product_id, 'price': 50.0, 'timestamp': datetime(2025, 3, 3, 8)},
+        {'product_id': product_id, 'price': 120.0, 'timestamp': datetime(2025, 3, 3, 10)},
+    ])
+    db.session.commit()
+
+    rollup = day_rollup(product_id)
+    assert rollup is loaded
+    assert (rollup.count, rollup.total) == (4, 570.0)
+    assert (rollup.min_price, rollup.max_price) == (50.0, 300.0)
+    assert (rollup.last_price, rollup.last_timestamp) == (120.0, datetime(2025, 3, 3, 10))
+
+
+def test_history_older_than_the_rollups_is_read_raw_until_rebuilt():
+    product_id = add_product()
+    # Written before the rollup table existed
+    db.session.add(PriceHistory(product_id=product_id, price=80.0, timestamp=datetime(2025, 3, 1, 9)))
+    insert_price_history([{'product_id': product_id, 'price': 100.0, 'timestamp': datetime(2025, 3, 3, 9)}])
+    db.session.commit()
+
+    assert rollup_summary(product_id, 'month', datetime(2025, 2, 15)) is None
+
+    rebuild_rollups(product_id)
+    summary = rollup_summary(product_id, 'month', datetime(2025, 2, 15))
+    assert (summary['count'], summary['average']) == (2, 90.0)
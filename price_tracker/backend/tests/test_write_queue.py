@@ -0,0 +1,47 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from app.write_queue import WriteQueue
+
+
+@pytest.fixture
+def write_queue(app):
+    write_queue = WriteQueue(timeout=0.1)
+    write_queue._app = app
+    write_queue.enabled = True
+    yield write_queue
+    write_queue.stop()
+
+
+def test_job_still_queued_at_the_timeout_is_withdrawn(write_queue):
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def blocking_write():
+        started.set()
+        release.wait(5)
+
+    # Keep the writer busy so the next job is still waiting when its caller gives up
+    write_queue.submit(blocking_write)
+    assert started.wait(5)
+
+    with pytest.raises(FutureTimeout):
+        write_queue.run(ran.append, 'late write')
+    release.set()
+    write_queue.stop()
+
+    assert ran == []
+    assert write_queue.stats()['jobs_abandoned'] == 1
+    assert write_queue.stats()['jobs_written'] == 1
+
+
+def test_job_already_running_at_the_timeout_is_waited_for(write_queue):
+    def slow_write():
+        time.sleep(0.3)
+        return 'committed'
+
+    assert write_queue.run(slow_write) == 'committed'
+    assert write_queue.stats()['jobs_abandoned'] == 0
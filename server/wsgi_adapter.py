@@ -0,0 +1,270 @@
+"""Run the Flask app behind serverless events and a local HTTP server, per PEP 3333.
+
+Both entry points in this directory go through here:
+- handle_event() turns a Vercel/Lambda-style event into a WSGI environ (file-like
+  wsgi.input, percent-encoded QUERY_STRING, base64 bodies) and the response back
+  into an event result, base64-encoding binary bodies.
+- serve() runs a threaded HTTP/1.1 server with keep-alive that streams responses
+  as they are produced (chunked when the app gives no Content-Length), so large
+  history exports and concurrent load tests work locally.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, unquote_to_bytes
+import base64
+import io
+import sys
+
+# Content types returned to the serverless runtime as text; everything else is base64
+TEXT_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml')
+
+# Responses that never carry a body
+NO_BODY_STATUSES = (204, 304)
+
+
+def build_environ(method, path, query_string, headers, body=b'', scheme='https',
+                  server_name='localhost', server_port='443', remote_addr='', server_protocol='HTTP/1.1'):
+    """WSGI environ for one request.
+
+    path is the raw (still percent-encoded) request path, query_string the
+    encoded query, headers a list of (name, value) pairs and body bytes.
+    """
+    environ = {
+        'REQUEST_METHOD': method.upper(),
+        'SCRIPT_NAME': '',
+        # PEP 3333: decoded path bytes, carried in a latin-1 str
+        'PATH_INFO': unquote_to_bytes(path or '/').decode('latin-1'),
+        'QUERY_STRING': query_string or '',
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': server_protocol,
+        'REMOTE_ADDR': remote_addr,
+        'CONTENT_LENGTH': str(len(body)) if body else '',
+        'CONTENT_TYPE': '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers:
+        key = name.upper().replace('-', '_')
+        if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            # The body length is taken from the bytes actually received
+            if key == 'CONTENT_TYPE':
+                environ[key] = value
+            continue
+        key = 'HTTP_' + key
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class _Response:
+    """Collects status and headers from start_response and the body chunks passed to write()."""
+
+    def __init__(self):
+        self.status = None
+        self.headers = []
+        self.headers_sent = False
+        self.written = []
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info is not None:
+            try:
+                if self.headers_sent:
+                    raise exc_info[1].with_traceback(exc_info[2])
+            finally:
+                exc_info = None
+        self.status = status
+        self.headers = list(headers)
+        return self.written.append
+
+    @property
+    def status_code(self):
+        return int(self.status.split(' ', 1)[0])
+
+
+def _query_from_event(event):
+    if event.get('rawQueryString') is not None:
+        return event['rawQueryString']
+    multi = event.get('multiValueQueryStringParameters')
+    if multi:
+        return urlencode([(key, value) for key, values in multi.items() for value in values or ()])
+    params = event.get('queryStringParameters')
+    if isinstance(params, dict):
+        return urlencode(params)
+    return params or ''
+
+
+def _headers_from_event(event):
+    multi = event.get('multiValueHeaders')
+    if multi:
+        return [(name, value) for name, values in multi.items() for value in values or ()]
+    return list((event.get('headers') or {}).items())
+
+
+def _is_text(headers):
+    content_type = next((value for name, value in headers if name.lower() == 'content-type'), '')
+    return content_type.startswith(TEXT_TYPES)
+
+
+def handle_event(app, event):
+    """Run one serverless event through app and return the runtime's response dict."""
+    path = event.get('path') or event.get('rawPath') or '/'
+    query_string = _query_from_event(event)
+    if '?' in path:
+        path, _, inline_query = path.partition('?')
+        query_string = query_string or inline_query
+
+    body = event.get('body') or b''
+    if isinstance(body, str):
+        body = base64.b64decode(body) if event.get('isBase64Encoded') else body.encode('utf-8')
+
+    headers = _headers_from_event(event)
+    lowered = {name.lower(): value for name, value in headers}
+    host = lowered.get('x-forwarded-host') or lowered.get('host') or 'localhost'
+    scheme = lowered.get('x-forwarded-proto', 'https').split(',')[0].strip()
+    server_name, _, server_port = host.partition(':')
+    environ = build_environ(
+        event.get('httpMethod') or event.get('requestContext', {}).get('http', {}).get('method', 'GET'),
+        path, query_string, headers, body,
+        scheme=scheme,
+        server_name=server_name,
+        server_port=server_port or ('443' if scheme == 'https' else '80'),
+        remote_addr=lowered.get('x-forwarded-for', '').split(',')[0].strip()
+    )
+
+    response = _Response()
+    result = app(environ, response.start_response)
+    try:
+        chunks = list(response.written)
+        chunks.extend(chunk for chunk in result if chunk)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    payload = b''.join(chunks)
+
+    multi_headers = {}
+    for name, value in response.headers:
+        multi_headers.setdefault(name, []).append(value)
+    text = _is_text(response.headers)
+    return {
+        'statusCode': response.status_code,
+        'headers': {name: values[-1] if name.lower() == 'set-cookie' else ','.join(values)
+                    for name, values in multi_headers.items()},
+        'multiValueHeaders': multi_headers,
+        'body': payload.decode('utf-8') if text else base64.b64encode(payload).decode('ascii'),
+        'isBase64Encoded': not text
+    }
+
+
+class WSGIRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler that runs requests through a WSGI app and streams the response.
+
+    Subclasses set app. Connections are kept alive between requests; responses
+    without a Content-Length go out with chunked transfer encoding as the app
+    yields them.
+    """
+    protocol_version = 'HTTP/1.1'
+    app = None
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # Skip trailers up to the blank line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return bytes(body)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _handle(self):
+        path, _, query_string = self.path.partition('?')
+        host = self.headers.get('Host', '')
+        environ = build_environ(
+            self.command, path, query_string,
+            [(name, value) for name, value in self.headers.items() if name.lower() != 'transfer-encoding'],
+            self._read_body(),
+            scheme='http',
+            server_name=host.partition(':')[0] or self.server.server_name,
+            server_port=self.server.server_port,
+            remote_addr=self.client_address[0],
+            server_protocol=self.request_version
+        )
+
+        response = _Response()
+        state = {'chunked': False}
+
+        def send_headers():
+            code = response.status_code
+            headers = response.headers
+            has_length = any(name.lower() == 'content-length' for name, _ in headers)
+            body_allowed = self.command != 'HEAD' and code not in NO_BODY_STATUSES and code >= 200
+            self.send_response(code, response.status.split(' ', 1)[1] if ' ' in response.status else '')
+            for name, value in headers:
+                self.send_header(name, value)
+            if body_allowed and not has_length:
+                if self.request_version == 'HTTP/1.1':
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    state['chunked'] = True
+                else:
+                    # HTTP/1.0 clients read to end of stream instead
+                    self.close_connection = True
+            self.end_headers()
+            response.headers_sent = True
+
+        def write(data):
+            if not response.headers_sent:
+                send_headers()
+            if not data or self.command == 'HEAD':
+                return
+            if state['chunked']:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            else:
+                self.wfile.write(data)
+
+        def start_response(status, headers, exc_info=None):
+            response.start_response(status, headers, exc_info)
+            return write
+
+        result = self.app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    write(chunk)
+                    self.wfile.flush()
+            if not response.headers_sent:
+                if not any(name.lower() == 'content-length' for name, _ in response.headers):
+                    response.headers.append(('Content-Length', '0'))
+                send_headers()
+            if state['chunked']:
+                self.wfile.write(b'0\r\n\r\n')
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _handle
+
+
+def make_handler(app):
+    """A WSGIRequestHandler subclass bound to app."""
+    return type('BoundWSGIRequestHandler', (WSGIRequestHandler,), {'app': staticmethod(app)})
+
+
+def serve(app, host='127.0.0.1', port=3001):
+    """Serve app with one thread per connection until interrupted."""
+    server = ThreadingHTTPServer((host, port), make_handler(app))
+    server.daemon_threads = True
+    print(f"Serving on http://{host}:{port} (threaded, keep-alive)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()